@@ -0,0 +1,59 @@
+# examples/run_conjugate_test.py
+import sys
+
+import numpy as np
+
+from geomag_transformations import conjugate, coordinates
+
+N_POINTS = 20000
+FOOTPOINT_ALT_KM = 110.0
+MAX_POSITION_ERROR_DEG = 1e-7
+MAX_L_RELATIVE_ERROR = 1e-10
+# Lines through points this close to the magnetic equator graze the
+# footpoint height, so with an off-centre (ED) dipole or an ellipsoidal
+# (geodetic) height they may not reach it again; they are left out
+GRAZING_LAT_DEG = 1.5
+
+def main():
+    """
+    Round trip: the conjugate of the conjugate point is the original point,
+    on the same field line (same L-shell), for the CD and ED frames and for
+    spherical and geodetic input. Points start at the footpoint altitude, so
+    the field line reaches it in the other hemisphere, except possibly for
+    lines grazing that height next to the magnetic equator.
+    """
+    failures = []
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-85.0, 85.0, N_POINTS)
+    lon = rng.uniform(-180.0, 180.0, N_POINTS)
+
+    print(f"--- Conjugate of the conjugate: {N_POINTS} points at {FOOTPOINT_ALT_KM:g} km, |magnetic lat| > {GRAZING_LAT_DEG:g}° ---")
+    for system in conjugate.SYSTEMS:
+        for geodetic in (False, True):
+            options = {"alt_km": FOOTPOINT_ALT_KM, "footpoint_alt_km": FOOTPOINT_ALT_KM, "system": system, "geodetic": geodetic}
+            transform = coordinates.geographic_to_cd_latlon if system == "CD" else coordinates.geographic_to_ed_latlon
+            magnetic_lat = transform(lat, lon, alt_km=FOOTPOINT_ALT_KM, geodetic=geodetic)[0]
+            keep = np.abs(magnetic_lat) > GRAZING_LAT_DEG
+            there = conjugate.calculate_conjugate_points_batch(lat[keep], lon[keep], **options)
+            back = conjugate.calculate_conjugate_points_batch(
+                there["Conjugate Latitude (°)"], there["Conjugate Longitude (°)"], **options
+            )
+            lat_error = float(np.max(np.abs(back["Conjugate Latitude (°)"] - lat[keep])))
+            lon_delta = back["Conjugate Longitude (°)"] - lon[keep]
+            lon_error = float(np.max(np.abs((lon_delta + 180.0) % 360.0 - 180.0) * np.cos(np.radians(lat[keep]))))
+            L_error = float(np.max(np.abs(back["L-Shell"] / there["L-Shell"] - 1.0)))
+            label = f"{system} {'geodetic' if geodetic else 'spherical'}"
+            print(f"{label:<14}: max |dlat| {lat_error:.1e}°, max |dlon|cos(lat) {lon_error:.1e}°, max |dL/L| {L_error:.1e}")
+            if not (lat_error <= MAX_POSITION_ERROR_DEG and lon_error <= MAX_POSITION_ERROR_DEG):
+                failures.append(f"{label}: the conjugate of the conjugate is not the original point")
+            if not L_error <= MAX_L_RELATIVE_ERROR:
+                failures.append(f"{label}: the conjugate point is on a different L-shell")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Conjugate check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,4 +1,6 @@
 # examples/run_coordinate_test.py
+import sys
+
 from geomag_transformations import coordinates
 import numpy as np
 
@@ -69,5 +71,32 @@ def main():
     print(f"Verification: Restored geographic point matches original? -> {is_close}")
     print("-" * 65)
 
+    # --- 6. Scalar latitude against an array of longitudes ---
+    # The lat/lon batch APIs broadcast their inputs, so a single latitude
+    # row must match the same call with the latitude repeated per point.
+    lons = np.linspace(-180.0, 180.0, 13)
+    broadcast_ok = True
+    print("--- Broadcasting a scalar latitude over 13 longitudes ---")
+    for name, func in (
+        ("geographic_to_cd_latlon", coordinates.geographic_to_cd_latlon),
+        ("cd_to_geographic_latlon", coordinates.cd_to_geographic_latlon),
+        ("geographic_to_ed_latlon", coordinates.geographic_to_ed_latlon),
+        ("ed_to_geographic_latlon", coordinates.ed_to_geographic_latlon),
+    ):
+        try:
+            scalar_lat = func(10.0, lons)
+            full_lat = func(np.full_like(lons, 10.0), lons)
+            ok = all(a.shape == lons.shape and np.allclose(a, b) for a, b in zip(scalar_lat, full_lat))
+        except ValueError as exc:
+            print(f"  {name}: raised {exc}")
+            ok = False
+        print(f"  {name}: {'ok' if ok else 'MISMATCH'}")
+        broadcast_ok &= ok
+    print("-" * 65)
+
+    passed = is_close and broadcast_ok
+    print("Coordinate check:", "passed" if passed else "FAILED")
+    return 0 if passed else 1
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
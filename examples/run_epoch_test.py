@@ -0,0 +1,66 @@
+# examples/run_epoch_test.py
+import sys
+
+import numpy as np
+
+from geomag_transformations import igrf, parameters
+
+# Values of the former hand-copied table, which the SHC-derived one must reproduce
+IGRF_1965 = [-30334.0, -2119.0, 5776.0, -1662.0, 2997.0, -2016.0, 1594.0, 114.0]
+IGRF_2025 = [-29350.0, -1410.3, 4545.5, -2556.2, 2950.9, -3133.6, 1648.7, -814.2]
+SECULAR_VARIATION_2025 = [12.6, 10.0, -21.5, -11.2, -5.3, -27.3, -8.3, -11.1]
+
+def _accepted(date):
+    try:
+        parameters._epoch_buckets(np.array([date], dtype="datetime64[ns]"))
+    except ValueError:
+        return False
+    return True
+
+def main():
+    """
+    Checks the degree-1/2 IGRF table read from data/IGRF14.shc and the date
+    range enforced by parameters._epoch_buckets at both edges.
+    """
+    failures = []
+    epochs = parameters.IGRF_EPOCHS
+    print("--- IGRF-14 degree-1/2 table ---")
+    print(f"epochs {epochs[0]:.0f}-{epochs[-1]:.0f} ({len(epochs)}), valid until {parameters.IGRF_VALID_UNTIL:.0f}")
+    if epochs[0] != 1900.0 or epochs[-1] != 2025.0 or parameters.IGRF_VALID_UNTIL != 2030.0:
+        failures.append("the table does not cover the full 1900-2030 range of the bundled model")
+    rows = {1965.0: IGRF_1965, 2025.0: IGRF_2025}
+    for epoch, expected in rows.items():
+        if not np.array_equal(parameters.IGRF_COEFFICIENTS[epochs == epoch][0], expected):
+            failures.append(f"the {epoch:.0f} row differs from the published coefficients")
+    if not np.allclose(parameters.IGRF_SECULAR_VARIATION, SECULAR_VARIATION_2025, rtol=0.0, atol=1e-9):
+        failures.append("the secular variation differs from the published 2025-2030 values")
+    g, h = igrf.default_igrf_coefficients().at(1987.3)
+    full = [g[1, 0], g[1, 1], h[1, 1], g[2, 0], g[2, 1], h[2, 1], g[2, 2], h[2, 2]]
+    if not np.allclose(parameters.interpolate_coefficients(1987.3), full, rtol=0.0, atol=1e-9):
+        failures.append("interpolate_coefficients disagrees with the full igrf model")
+
+    print()
+    print("--- Epoch bucket range ---")
+    edges = {
+        "1899-12-31": False,
+        "1900-01-01": True,
+        "1964-12-31": True,
+        "2029-12-31T23:00": True,
+        "2030-01-01": True,
+        "2030-01-01T12:00": False,
+        "2030-01-02": False,
+    }
+    for date, expected in edges.items():
+        accepted = _accepted(date)
+        print(f"{date:<18}: {'accepted' if accepted else 'ValueError'}")
+        if accepted != expected:
+            failures.append(f"{date} was {'accepted' if accepted else 'rejected'}")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Epoch check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
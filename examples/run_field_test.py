@@ -1,15 +1,127 @@
 #examples/run_field_test.py
+import sys
 
-from geomag_transformations import field
+import numpy as np
+
+from geomag_transformations import field, parameters
 
 # Location: Bengaluru, India
 bengaluru_lat = 12.9716
 bengaluru_lon = 77.5946
 
-print(f"Calculating geomagnetic field for Bengaluru (Lat: {bengaluru_lat}, Lon: {bengaluru_lon})")
-print("-" * 65)
+N_POINTS = 2000
+SCALAR_KEYS = ("Br (nT)", "B_theta (nT)", "B_lambda (nT)", "Dip Angle (°)", "Declination Angle (°)")
+TOLERANCE_NT = 1e-6
+TOLERANCE_DEG = 1e-9
+FUSED_RELATIVE_TOLERANCE = 1e-9
+
+def _max_differences(result, expected, keys):
+    """Largest absolute difference per key; angles are wrapped to [-180, 180)."""
+    differences = {}
+    for key in keys:
+        delta = np.asarray(result[key]) - np.asarray(expected[key])
+        if "°" in key:
+            delta = (delta + 180.0) % 360.0 - 180.0
+        differences[key] = float(np.max(np.abs(delta)))
+    return differences
+
+def _within_tolerance(differences):
+    return all(value <= (TOLERANCE_DEG if "°" in key else TOLERANCE_NT) for key, value in differences.items())
+
+def main():
+    print(f"Calculating geomagnetic field for Bengaluru (Lat: {bengaluru_lat}, Lon: {bengaluru_lon})")
+    print("-" * 65)
+
+    field_data = field.calculate_geomagnetic_field(bengaluru_lat, bengaluru_lon)
+
+    for name, value in field_data.items():
+        print(f"🔹 {name:<25}: {value:.2f}")
+
+    failures = []
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-89.0, 89.0, N_POINTS)
+    lon = rng.uniform(-180.0, 180.0, N_POINTS)
+
+    # The CD model is the IGRF-1990 dipole without the degree-2 terms, so its
+    # ED offset is zero and the field reduces to the centred dipole.
+    models = {
+        "ED": parameters.get_dipole_model(),
+        "CD": parameters.get_dipole_model(parameters.IGRF_1990[:3] + (0.0,) * 5),
+    }
+    print()
+    print(f"--- Batch vs scalar: {N_POINTS} random points ---")
+    for name, model in models.items():
+        batch = field.calculate_geomagnetic_field_batch(lat, lon, model=model)
+        scalar = {key: np.empty(N_POINTS) for key in SCALAR_KEYS}
+        for i in range(N_POINTS):
+            point = field.calculate_geomagnetic_field(lat[i], lon[i], model=model)
+            for key in SCALAR_KEYS:
+                scalar[key][i] = point[key]
+        differences = _max_differences(batch, scalar, SCALAR_KEYS)
+        print(f"{name}: max |batch - scalar| = " + ", ".join(f"{key} {value:.1e}" for key, value in differences.items()))
+        if not _within_tolerance(differences):
+            failures.append(f"{name} batch output differs from the scalar function: {differences}")
+
+    print()
+    print("--- Broadcasting ---")
+    all_keys = field.FIELD_KEYS
+    row = field.calculate_geomagnetic_field_batch(45.0, lon)
+    expected = field.calculate_geomagnetic_field_batch(np.full(N_POINTS, 45.0), lon)
+    differences = _max_differences(row, expected, all_keys)
+    shapes_ok = all(row[key].shape == (N_POINTS,) for key in all_keys)
+    print(f"scalar lat, array lon : shape {row['Br (nT)'].shape}, max difference {max(differences.values()):.1e}")
+    if not shapes_ok or not _within_tolerance(differences):
+        failures.append("a scalar latitude does not broadcast against an array of longitudes")
+
+    grid_lat, grid_lon = np.meshgrid(np.linspace(-80.0, 80.0, 17), np.linspace(-180.0, 170.0, 36), indexing="ij")
+    grid = field.calculate_geomagnetic_field_batch(grid_lat, grid_lon)
+    flat = field.calculate_geomagnetic_field_batch(grid_lat.ravel(), grid_lon.ravel())
+    differences = _max_differences({key: grid[key].ravel() for key in all_keys}, flat, all_keys)
+    shapes_ok = all(grid[key].shape == grid_lat.shape for key in all_keys)
+    print(f"2-D grid              : shape {grid['Br (nT)'].shape}, max difference {max(differences.values()):.1e}")
+    if not shapes_ok or not _within_tolerance(differences):
+        failures.append("a 2-D grid does not match the same points passed flattened")
+
+    print()
+    print("--- Fused vs batch: geodetic=True, per-point dates ---")
+    alt = rng.uniform(0.0, 1000.0, N_POINTS)
+    dates = np.datetime64("1970-01-01", "ns") + rng.integers(0, 55 * 365 * 86400, N_POINTS).astype("timedelta64[s]")
+    kwargs = {"alt_km": alt, "dates": dates, "geodetic": True}
+    batch = field.calculate_geomagnetic_field_batch(lat, lon, **kwargs)
+    fused = field.calculate_geomagnetic_field_fused(lat, lon, **kwargs)
+    # Components relative to the total field, angles relative to a full turn
+    total = np.sqrt(batch["Br (nT)"]**2 + batch["B_theta (nT)"]**2 + batch["B_lambda (nT)"]**2)
+    relative = {}
+    for key, difference in _max_differences(fused, batch, all_keys).items():
+        relative[key] = difference / 360.0 if "°" in key else float(np.max(np.abs(fused[key] - batch[key]) / total))
+    print("max relative |fused - batch| = " + ", ".join(f"{key} {value:.1e}" for key, value in relative.items()))
+    if max(relative.values()) > FUSED_RELATIVE_TOLERANCE:
+        failures.append(f"fused output differs from the batch output by more than {FUSED_RELATIVE_TOLERANCE:g}: {relative}")
+
+    out = np.full((len(all_keys), N_POINTS), np.nan)
+    result = field.calculate_geomagnetic_field_fused(lat, lon, out=out, **kwargs)
+    in_place = all(np.shares_memory(result[key], out) and np.array_equal(out[i], fused[key]) for i, key in enumerate(all_keys))
+    print(f"out= filled in place  : {in_place}")
+    if not in_place:
+        failures.append("calculate_geomagnetic_field_fused does not fill the caller's out= buffer in place")
+
+    bad_buffers = {
+        "wrong shape": np.empty((len(all_keys), N_POINTS + 1)),
+        "wrong dtype": np.empty((len(all_keys), N_POINTS), dtype=np.float32),
+    }
+    for label, buffer in bad_buffers.items():
+        try:
+            field.calculate_geomagnetic_field_fused(lat, lon, out=buffer, **kwargs)
+        except ValueError as error:
+            print(f"out= {label:<12}: ValueError ({error})")
+        else:
+            failures.append(f"an out= buffer with the {label} was accepted")
 
-field_data = field.calculate_geomagnetic_field(bengaluru_lat, bengaluru_lon)
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Field check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
 
-for name, value in field_data.items():
-    print(f"🔹 {name:<25}: {value:.2f}")
\ No newline at end of file
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# examples/run_grid_test.py
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from geomag_transformations import grid
+
+# Documented maximum errors of the default 0.5 degree surface grid, see grid.py
+ERROR_BOUNDS = {
+    "Br (nT)": 1.2,
+    "B_theta (nT)": 1.2,
+    "B_lambda (nT)": 1.2,
+    "Dip Angle (°)": 0.001,
+    "Declination Angle (°)": 0.01,
+    "CD Latitude (°)": 0.001,
+    "CD Longitude (°)": 0.01,
+    "ED Latitude (°)": 0.001,
+    "ED Longitude (°)": 0.01,
+}
+
+def main():
+    """
+    Checks estimate_max_error against the documented bounds for the default
+    resolution, and that a grid saved and memory-mapped back gives identical
+    values and interpolation results.
+    """
+    failures = []
+    lookup = grid.build_lookup_grid()
+    print(f"--- Default {grid.DEFAULT_RESOLUTION_DEG:g}° grid vs analytic path ---")
+    errors = grid.estimate_max_error(lookup)
+    for key, bound in ERROR_BOUNDS.items():
+        print(f"{key:<24}: {errors[key]:.2e} (bound {bound:g})")
+        if not errors[key] < bound:
+            failures.append(f"{key} error {errors[key]:.2e} exceeds the documented {bound:g}")
+    if set(errors) != set(ERROR_BOUNDS):
+        failures.append(f"estimate_max_error reports {sorted(errors)}, expected {sorted(ERROR_BOUNDS)}")
+
+    print()
+    print("--- save_lookup_grid / load_lookup_grid(mmap=True) ---")
+    rng = np.random.default_rng(1)
+    lat, lon = rng.uniform(-90.0, 90.0, 10000), rng.uniform(-180.0, 180.0, 10000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "grid.npy")
+        grid.save_lookup_grid(lookup, path)
+        loaded = grid.load_lookup_grid(path, mmap=True)
+        memory_mapped = isinstance(loaded.values, np.memmap) and not loaded.values.flags.writeable
+        same_values = np.array_equal(loaded.values, lookup.values)
+        same_meta = (
+            loaded.resolution_deg == lookup.resolution_deg and np.array_equal(loaded.altitudes_km, lookup.altitudes_km)
+            and loaded.coefficients == lookup.coefficients and loaded.r0 == lookup.r0
+        )
+        expected = grid.interpolate_lookup_grid(lookup, lat, lon)
+        result = grid.interpolate_lookup_grid(loaded, lat, lon)
+        same_queries = all(np.array_equal(result[key], expected[key]) for key in expected)
+        print(f"memory-mapped read-only: {memory_mapped}, values identical: {same_values}, "
+              f"metadata identical: {same_meta}, queries identical: {same_queries}")
+        del loaded, result
+    if not memory_mapped:
+        failures.append("load_lookup_grid(mmap=True) did not return a read-only memory map")
+    if not (same_values and same_meta and same_queries):
+        failures.append("the saved and reloaded grid differs from the original")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Grid check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# examples/run_igrf_test.py
+import sys
+
+import numpy as np
+
+from geomag_transformations import igrf
+
+# IGRF-14 reference values (nT) at 2020-01-01, geodetic latitude/longitude (deg) and height (km),
+# from the ppigrf 2.1.0 implementation of the IAGA model: (lat, lon, h, north, east, down)
+REFERENCE = (
+    (-30.0, -45.0, 0.0, 15058.944, -5606.672, -16270.847),
+    (45.0, 90.0, 0.0, 23507.375, 879.428, 52901.967),
+    (80.0, -100.0, 300.0, 1569.656, -673.481, 50137.456),
+    (0.0, 0.0, 0.0, 27539.074, -2244.618, -16008.521),
+)
+TOLERANCE_NT = 0.01
+
+def total_intensity(out):
+    return np.sqrt(out["B_north (nT)"]**2 + out["B_east (nT)"]**2 + out["B_down (nT)"]**2)
+
+def main():
+    """
+    Checks the bundled degree-13 IGRF-14 model against reference values and
+    that it resolves the South Atlantic Anomaly, which the dipole terms do not.
+    """
+    failures = []
+    coefficients = igrf.default_igrf_coefficients()
+    print(f"Bundled model: degree {coefficients.nmax}, {coefficients.epochs[0]:.0f}-{coefficients.valid_until:.0f}")
+    if coefficients.nmax != 13:
+        failures.append(f"bundled model has degree {coefficients.nmax}, expected 13")
+
+    lat, lon, h, north, east, down = map(np.array, zip(*REFERENCE))
+    out = igrf.calculate_igrf_field_batch(lat, lon, alt_km=h, date="2020-01-01", geodetic=True)
+    print("--- IGRF-14 vs reference (2020-01-01) ---")
+    for i in range(len(REFERENCE)):
+        got = (out["B_north (nT)"][i], out["B_east (nT)"][i], out["B_down (nT)"][i])
+        error = max(abs(a - b) for a, b in zip(got, (north[i], east[i], down[i])))
+        print(f"lat {lat[i]:6.1f} lon {lon[i]:7.1f} h {h[i]:5.0f}: "
+              f"N {got[0]:10.3f}  E {got[1]:10.3f}  D {got[2]:10.3f}  max error {error:.4f} nT")
+        if error > TOLERANCE_NT:
+            failures.append(f"point {i} differs from the reference by {error:.4f} nT")
+
+    # The SAA: minimum surface intensity of about 22,000 nT over South America in 2020
+    grid_lat, grid_lon = np.meshgrid(np.arange(-89.5, 90.0, 1.0), np.arange(-180.0, 180.0, 1.0), indexing="ij")
+    F = total_intensity(igrf.calculate_igrf_field_batch(grid_lat, grid_lon, date="2020-01-01"))
+    i = np.unravel_index(np.argmin(F), F.shape)
+    print(f"Minimum surface intensity: {F[i]:.0f} nT at lat {grid_lat[i]:.1f}, lon {grid_lon[i]:.1f}")
+    if not (-35.0 <= grid_lat[i] <= -15.0 and -70.0 <= grid_lon[i] <= -45.0 and 21500.0 <= F[i] <= 23000.0):
+        failures.append("the intensity minimum is not the South Atlantic Anomaly")
+
+    # The grid path (shared, cached colatitude tables) must agree with per-point tables
+    pick = np.random.default_rng(0).choice(F.size, 300, replace=False)
+    F_points = total_intensity(igrf.calculate_igrf_field_batch(grid_lat.ravel()[pick], grid_lon.ravel()[pick], date="2020-01-01"))
+    grid_error = np.max(np.abs(F_points - F.ravel()[pick]))
+    print(f"Grid vs per-point tables: max difference {grid_error:.2e} nT")
+    if grid_error > 1e-6:
+        failures.append(f"grid and per-point evaluation differ by {grid_error:.2e} nT")
+
+    # B_phi uses P_n^m / sin(theta) built without division, so the field is continuous at the poles
+    pole_lon = np.linspace(-180.0, 150.0, 12)
+    for pole in (90.0, -90.0):
+        at_pole = igrf.calculate_igrf_field_batch(pole, pole_lon, date=2020.0)
+        near_pole = igrf.calculate_igrf_field_batch(pole - np.copysign(1e-6, pole), pole_lon, date=2020.0)
+        jump = max(np.max(np.abs(at_pole[key] - near_pole[key])) for key in ("B_north (nT)", "B_east (nT)", "B_down (nT)"))
+        print(f"Field jump between lat {pole:+.0f} and 1e-6 deg away: {jump:.2e} nT")
+        if jump > 0.01:
+            failures.append(f"the field is discontinuous at lat {pole:+.0f} ({jump:.2e} nT)")
+
+    # The table cache is bounded by bytes however many grids are evaluated
+    for rows in (1000, 1001, 1002):
+        igrf.calculate_igrf_field_batch(np.linspace(-89.9, 89.9, rows)[:, None], np.linspace(-180.0, 180.0, 1000), date=2020.0)
+    print(f"Legendre cache: {igrf._legendre_cache_bytes / 2**20:.1f} MB in {len(igrf._legendre_cache)} tables")
+    if igrf._legendre_cache_bytes > igrf.LEGENDRE_CACHE_BYTES:
+        failures.append("the Legendre cache exceeds LEGENDRE_CACHE_BYTES")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("IGRF check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
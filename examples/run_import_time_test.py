@@ -0,0 +1,64 @@
+# examples/run_import_time_test.py
+import subprocess
+import sys
+
+# Cold-import budget (seconds) for the core coordinate/field path, on top of NumPy itself
+IMPORT_BUDGET_S = 0.03
+RUNS = 5
+
+def cold_import_time(statement, setup=""):
+    """
+    Best-of-RUNS wall time of `statement` in a fresh interpreter, after an
+    untimed `setup`, plus the modules it left loaded.
+    """
+    script = (
+        "import sys, time\n"
+        f"{setup}\n"
+        "t0 = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(time.perf_counter() - t0)\n"
+        "print(' '.join(sorted(sys.modules)))\n"
+    )
+    best, modules = float("inf"), set()
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+        elapsed, loaded = output.splitlines()
+        best = min(best, float(elapsed))
+        modules = set(loaded.split())
+    return best, modules
+
+def main(budget_s=IMPORT_BUDGET_S):
+    """
+    Measures the cold import of the package and its core path in fresh
+    interpreters and fails if the core path exceeds the budget or pulls in an
+    optional backend.
+    """
+    numpy_s, _ = cold_import_time("import numpy")
+    package_s, package_modules = cold_import_time("import geomag_transformations")
+    # NumPy is imported untimed first, so only the package's own import cost is measured
+    overhead_s, core_modules = cold_import_time(
+        "import geomag_transformations.coordinates, geomag_transformations.field", setup="import numpy"
+    )
+
+    print("--- Cold Import Times (best of %d) ---" % RUNS)
+    print(f"numpy                          : {numpy_s * 1e3:8.1f} ms")
+    print(f"geomag_transformations         : {package_s * 1e3:8.1f} ms")
+    print(f"Core path overhead over numpy  : {overhead_s * 1e3:8.1f} ms (budget {budget_s * 1e3:.0f} ms)")
+
+    failures = []
+    if "numpy" in package_modules:
+        failures.append("`import geomag_transformations` imported numpy; submodules should load lazily")
+    heavy = sorted({"ephem", "matplotlib", "cartopy", "pyarrow", "netCDF4"} & core_modules)
+    if heavy:
+        failures.append(f"the core path imported optional backends: {', '.join(heavy)}")
+    if overhead_s > budget_s:
+        failures.append(f"core import overhead {overhead_s * 1e3:.1f} ms exceeds the {budget_s * 1e3:.0f} ms budget")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Import time check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(float(sys.argv[1]) if len(sys.argv) > 1 else IMPORT_BUDGET_S))
@@ -0,0 +1,67 @@
+# examples/run_instrumentation_test.py
+import logging
+import sys
+
+from geomag_transformations import field, instrumentation
+
+class _ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+def main():
+    """
+    Checks that a raising hook is logged, leaves the instrumented function's
+    return value unchanged and does not stop the hooks registered after it.
+    """
+    failures = []
+    handler = _ListHandler()
+    logger = logging.getLogger(instrumentation.__name__)
+    logger.addHandler(handler)
+    propagate, logger.propagate = logger.propagate, False
+
+    expected = field.calculate_geomagnetic_field(12.9716, 77.5946)
+    seen = []
+
+    def failing_hook(stage, seconds, batch_size):
+        raise RuntimeError("metrics backend unavailable")
+
+    def later_hook(stage, seconds, batch_size):
+        seen.append((stage, batch_size))
+
+    instrumentation.add_hook(failing_hook)
+    try:
+        with instrumentation.instrumented(hook=later_hook, reset_stats=True) as snapshot:
+            result = field.calculate_geomagnetic_field(12.9716, 77.5946)
+            stats = snapshot()
+    finally:
+        instrumentation.remove_hook(failing_hook)
+        logger.removeHandler(handler)
+        logger.propagate = propagate
+
+    print("--- Raising instrumentation hook ---")
+    print(f"return value unchanged : {result == expected}")
+    print(f"later hook calls       : {seen}")
+    print(f"log records            : {[r.getMessage() for r in handler.records]}")
+    if result != expected:
+        failures.append("a raising hook changed the instrumented function's return value")
+    # The call records its own stage and the nested parameters.get_dipole_model one
+    if ("field.calculate_geomagnetic_field", 1) not in seen:
+        failures.append("the hook registered after the raising one did not run")
+    logged = [r for r in handler.records if r.levelno == logging.ERROR and r.exc_info and r.exc_info[0] is RuntimeError]
+    if len(logged) != len(seen) or not all(repr(stage) in r.getMessage() for (stage, _), r in zip(seen, logged)):
+        failures.append("the hook's exception was not logged once per recorded stage")
+    if stats.get("field.calculate_geomagnetic_field", {}).get("count") != 1:
+        failures.append("the call was not recorded")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Instrumentation check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,45 @@
+# examples/run_parallel_test.py
+import sys
+
+import numpy as np
+
+from geomag_transformations import field, parallel
+
+N_POINTS = 100003
+CHUNK_SIZE = 7919  # does not divide N_POINTS, so the last chunk is short
+WORKERS = 4
+
+def main():
+    """
+    Checks that parallel.run_chunked returns exactly what one direct call
+    returns, for both backends, with per-point dates= and alt_km= arrays
+    passed through func_kwargs (which must be chunked with the inputs).
+    """
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-90.0, 90.0, N_POINTS)
+    lon = rng.uniform(-180.0, 180.0, N_POINTS)
+    alt = rng.uniform(0.0, 1000.0, N_POINTS)
+    dates = np.datetime64("1970-01-01", "ns") + rng.integers(0, 55 * 365 * 86400, N_POINTS).astype("timedelta64[s]")
+    kwargs = {"alt_km": alt, "dates": dates, "geodetic": True}
+
+    expected = field.calculate_geomagnetic_field_batch(lat, lon, **kwargs)
+    failures = []
+    print(f"--- run_chunked vs direct call: {N_POINTS} points, chunks of {CHUNK_SIZE} ---")
+    for backend in ("thread", "process"):
+        result = parallel.run_chunked(
+            field.calculate_geomagnetic_field_batch, (lat, lon), kwargs,
+            chunk_size=CHUNK_SIZE, workers=WORKERS, backend=backend,
+        )
+        mismatched = [key for key in expected if not np.array_equal(result[key], expected[key])]
+        print(f"{backend:<8}: {len(expected) - len(mismatched)}/{len(expected)} outputs bit-identical")
+        if mismatched or set(result) != set(expected):
+            failures.append(f"{backend} backend differs from the direct call in {mismatched}")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Parallel check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+# examples/run_pipeline_test.py
+import importlib.util
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from geomag_transformations import pipeline
+
+N_RECORDS = 1003
+CHUNK_SIZES = (100, 257, 100000)  # none divides N_RECORDS; the last holds it in one chunk
+
+def _write_input(path, n_records, seed=0):
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-89.0, 89.0, n_records)
+    lon = rng.uniform(-180.0, 180.0, n_records)
+    alt = rng.uniform(0.0, 800.0, n_records)
+    utc = np.datetime64("1975-01-01", "s") + rng.integers(0, 50 * 365 * 86400, n_records).astype("timedelta64[s]")
+    with open(path, "w", newline="") as handle:
+        handle.write("lat,lon,alt,time\n")
+        for row in zip(lat, lon, alt, utc):
+            handle.write("%r,%r,%r,%sZ\n" % (float(row[0]), float(row[1]), float(row[2]), row[3]))
+
+def _read_all(path):
+    """Concatenates every chunk of a file into one dict of arrays."""
+    chunks = list(pipeline.read_chunks(path))
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+def _output_columns():
+    return ["cd_lat", "cd_lon", "ed_lat", "ed_lon", "ed_r_km"] + list(pipeline.TIME_COLUMNS.values()) + list(pipeline.FIELD_COLUMNS.values())
+
+def _max_difference(result, expected, columns):
+    return max(float(np.max(np.abs(np.asarray(result[c], dtype=float) - np.asarray(expected[c], dtype=float)))) for c in columns)
+
+def main():
+    """
+    Runs the streaming pipeline over CSV input and checks the empty-input
+    header, the CSV round trip against a direct transform_chunk call, that the
+    output does not depend on chunk_size, and the Parquet/NetCDF writers when
+    their optional packages are installed.
+    """
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        records = os.path.join(tmp, "records.csv")
+        _write_input(records, N_RECORDS)
+        kwargs = {"alt_column": "alt", "geodetic": True}
+
+        print("--- Empty input ---")
+        empty = os.path.join(tmp, "empty.csv")
+        with open(empty, "w", newline="") as handle:
+            handle.write("lat,lon,alt,time\n")
+        empty_out = os.path.join(tmp, "empty_out.csv")
+        stats = pipeline.run_pipeline(empty, empty_out, chunk_size=100, **kwargs)
+        with open(empty_out) as handle:
+            lines = handle.read().splitlines()
+        header = [name.strip('"') for name in lines[0].split(",")] if lines else []
+        print(f"rows {stats['rows']}, output lines {len(lines)}, header {len(header)} columns")
+        if stats["rows"] != 0 or len(lines) != 1 or header != ["lat", "lon", "alt", "time"] + _output_columns():
+            failures.append(f"empty input did not give a header-only output: {lines}")
+
+        print()
+        print(f"--- CSV -> CSV round trip: {N_RECORDS} records ---")
+        expected = pipeline.transform_chunk(next(pipeline.read_chunks(records, chunk_size=N_RECORDS)), **kwargs)
+        outputs = {}
+        for chunk_size in CHUNK_SIZES:
+            path = os.path.join(tmp, f"out_{chunk_size}.csv")
+            stats = pipeline.run_pipeline(records, path, chunk_size=chunk_size, **kwargs)
+            with open(path, "rb") as handle:
+                outputs[chunk_size] = handle.read()
+            if stats["rows"] != N_RECORDS:
+                failures.append(f"chunk_size={chunk_size} processed {stats['rows']} of {N_RECORDS} rows")
+        result = _read_all(os.path.join(tmp, f"out_{CHUNK_SIZES[0]}.csv"))
+        inputs_kept = all(np.array_equal(result[c], expected[c]) for c in ("lat", "lon", "alt", "time"))
+        difference = _max_difference(result, expected, _output_columns())
+        print(f"input columns unchanged: {inputs_kept}, max |file - transform_chunk| = {difference:.1e}")
+        if not inputs_kept or list(result) != list(expected) or difference > 1e-9:
+            failures.append("the CSV output does not match transform_chunk on the same records")
+        identical = all(output == outputs[CHUNK_SIZES[0]] for output in outputs.values())
+        print(f"chunk sizes {CHUNK_SIZES}: byte-identical output {identical}")
+        if not identical:
+            failures.append("the CSV output changes with chunk_size")
+
+        print()
+        print("--- Optional formats ---")
+        for fmt, extension, package in (("parquet", "parquet", "pyarrow"), ("netcdf", "nc", "netCDF4")):
+            if importlib.util.find_spec(package) is None:
+                print(f"{fmt:<8}: skipped ({package} is not installed)")
+                continue
+            path = os.path.join(tmp, f"out.{extension}")
+            pipeline.run_pipeline(records, path, chunk_size=CHUNK_SIZES[1], **kwargs)
+            result = _read_all(path)
+            difference = _max_difference(result, expected, ["lat", "lon", "alt"] + _output_columns())
+            print(f"{fmt:<8}: max |file - transform_chunk| = {difference:.1e}")
+            if difference > 1e-9:
+                failures.append(f"the {fmt} output does not match transform_chunk")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Pipeline check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# examples/run_service_test.py
+import asyncio
+import json
+import sys
+
+import numpy as np
+
+from geomag_transformations import field, service, times
+
+CLIENTS = 400
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 2.0
+
+async def post(host, port, path, payload):
+    """One HTTP/1.1 request on its own connection; returns (status, decoded JSON body)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    body = json.dumps(payload).encode()
+    writer.write(
+        f"{'GET' if payload is None else 'POST'} {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body) if payload is not None else 0}\r\n"
+        "Connection: close\r\n\r\n".encode() + (body if payload is not None else b"")
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    response = json.loads(await reader.readexactly(length))
+    writer.close()
+    return status, response
+
+async def run(clients=CLIENTS):
+    """
+    Starts the service on an ephemeral local port, fires concurrent single
+    point requests at it and checks every response against a direct
+    vectorized call.
+    """
+    svc = service.GeomagService(max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS)
+    server = await svc.start(port=0)
+    host, port = server.sockets[0].getsockname()[:2]
+
+    rng = np.random.default_rng(1)
+    lat = rng.uniform(-80, 80, clients)
+    lon = rng.uniform(-180, 180, clients)
+    dates = np.array(["2015-06-01T00:00:00"] * (clients // 2) + [None] * (clients - clients // 2), dtype=object)
+    utc = np.datetime64("2020-03-20T12:00:00") + rng.integers(0, 86400, clients).astype("timedelta64[s]")
+
+    try:
+        field_responses = await asyncio.gather(*[
+            post(host, port, "/field", {"lat": lat[i], "lon": lon[i], "date": dates[i]}) for i in range(clients)
+        ])
+        times_responses = await asyncio.gather(*[
+            post(host, port, "/times", {"lat": lat[i], "lon": lon[i], "utc": str(utc[i])}) for i in range(clients)
+        ])
+        bad_status, bad = await post(host, port, "/field", {"lat": 10.0, "lon": 20.0, "date": "1899-01-01"})
+        _, stats = await post(host, port, "/stats", None)
+    finally:
+        await svc.stop()
+
+    half = clients // 2
+    dated = field.calculate_geomagnetic_field_fused(lat[:half], lon[:half], dates=np.array(dates[:half].tolist(), dtype="datetime64[ns]"))
+    undated = field.calculate_geomagnetic_field_fused(lat[half:], lon[half:])
+    expected_times = times.calculate_geomagnetic_times_batch(lat, lon, utc)
+
+    failures = []
+    for i, (status, response) in enumerate(field_responses):
+        expected = dated if i < half else undated
+        j = i if i < half else i - half
+        if status != 200 or any(not np.isclose(response[k], expected[k][j], rtol=1e-12) for k in expected):
+            failures.append(f"/field request {i}: {status} {response}")
+    for i, (status, response) in enumerate(times_responses):
+        if status != 200 or any(not np.isclose(response[k], expected_times[k][i], rtol=1e-12) for k in expected_times):
+            failures.append(f"/times request {i}: {status} {response}")
+    if bad_status != 400:
+        failures.append(f"out-of-range date answered {bad_status} {bad}")
+
+    print(f"--- Service Test ({clients} concurrent clients per endpoint) ---")
+    for endpoint, endpoint_stats in stats.items():
+        print(f"/{endpoint}:")
+        for name, value in endpoint_stats.items():
+            print(f"  {name:<22}: {value:.3f}" if isinstance(value, float) else f"  {name:<22}: {value}")
+    print(f"Out-of-range date -> {bad_status}: {bad['error']}")
+    print("-" * 65)
+    for failure in failures[:10]:
+        print(f"FAIL: {failure}")
+    print("Service check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+def main():
+    return asyncio.run(run())
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# examples/run_solar_test.py
+import importlib.util
+import sys
+
+import numpy as np
+
+from geomag_transformations import times
+
+# Bounds of the NumPy ephemeris against PyEphem, see times.calculate_solar_terms
+MAX_EQUATION_OF_TIME_S = 5.0
+MAX_DECLINATION_DEG = 0.01
+N_SAMPLES = 2000
+
+def _counters():
+    info = times.solar_cache_info()
+    return info["hits"], info["misses"], info["currsize"]
+
+def main():
+    """
+    Checks the solar cache counters: bucketed lookups count one miss per new
+    bucket and one hit per cached bucket, while exact timestamps
+    (resolution_s=0, as used by the scalar calculate_geomagnetic_times)
+    neither read nor fill the cache. With PyEphem installed, also checks the
+    NumPy solar ephemeris against it over 1965-2030.
+    """
+    failures = []
+    utc = np.datetime64("2015-03-20T09:00:00", "ns") + np.arange(0, 600, 7).astype("timedelta64[s]")
+    previous = times.solar_cache_info()
+    times.configure_solar_cache(resolution_s=60.0, maxsize=4096)
+    try:
+        print("--- Solar cache counters (60 s buckets) ---")
+        times.get_solar_terms(utc)
+        first = _counters()
+        times.get_solar_terms(utc)
+        second = _counters()
+        print(f"first call : hits {first[0]}, misses {first[1]}, size {first[2]}")
+        print(f"second call: hits {second[0]}, misses {second[1]}, size {second[2]}")
+        if first != (0, 10, 10) or second != (10, 10, 10):
+            failures.append(f"bucketed lookups counted {first} then {second}, expected (0, 10, 10) then (10, 10, 10)")
+
+        print()
+        print("--- Exact timestamps (resolution_s=0) ---")
+        exact = times.get_solar_terms(utc, resolution_s=0)
+        scalar = times.get_solar_terms(utc[3], resolution_s=0)
+        times.calculate_geomagnetic_times(12.9716, 77.5946, utc=utc[5].astype("datetime64[us]").item())
+        after = _counters()
+        print(f"after exact calls: hits {after[0]}, misses {after[1]}, size {after[2]}")
+        if after != second:
+            failures.append(f"resolution_s=0 changed the cache counters from {second} to {after}")
+        direct = times.calculate_solar_terms(utc)
+        if not (np.array_equal(exact[0], direct[0]) and np.array_equal(exact[1], direct[1])):
+            failures.append("resolution_s=0 does not return the exact-timestamp solar terms")
+        if scalar != (float(direct[0][3]), float(direct[1][3])):
+            failures.append("a scalar timestamp with resolution_s=0 does not return floats of the exact terms")
+    finally:
+        times.configure_solar_cache(resolution_s=previous["resolution_s"], maxsize=previous["maxsize"])
+
+    print()
+    print(f"--- NumPy ephemeris vs PyEphem: {N_SAMPLES} dates, 1965-2030 ---")
+    if importlib.util.find_spec("ephem") is None:
+        print("skipped (ephem is not installed)")
+    else:
+        rng = np.random.default_rng(0)
+        span_s = int((np.datetime64("2030-12-31", "s") - np.datetime64("1965-01-01", "s")).astype(np.int64))
+        samples = np.datetime64("1965-01-01", "s") + rng.integers(0, span_s, N_SAMPLES).astype("timedelta64[s]")
+        delta_t, declination = times.calculate_solar_terms(samples)
+        ephem_delta_t, ephem_declination = times.get_solar_terms(samples, backend="ephem", resolution_s=0)
+        eot_error_s = float(np.max(np.abs(delta_t - ephem_delta_t))) * 3600.0
+        dec_error_deg = float(np.degrees(np.max(np.abs(declination - ephem_declination))))
+        print(f"max |equation of time error| : {eot_error_s:.2f} s (bound {MAX_EQUATION_OF_TIME_S:g} s)")
+        print(f"max |declination error|      : {dec_error_deg:.4f}° (bound {MAX_DECLINATION_DEG:g}°)")
+        if eot_error_s > MAX_EQUATION_OF_TIME_S:
+            failures.append(f"equation of time differs from PyEphem by {eot_error_s:.2f} s")
+        if dec_error_deg > MAX_DECLINATION_DEG:
+            failures.append(f"declination differs from PyEphem by {dec_error_deg:.4f}°")
+
+    print("-" * 65)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Solar check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,66 @@
 # examples/run_time_test.py
-from geomag_transformations import times
+import sys
+
+import numpy as np
+
+from geomag_transformations import parameters, times
 
 # Location: Bengaluru, India
 bengaluru_lat = 12.9716
 bengaluru_lon = 77.5946
 
-print(f"Calculating geomagnetic times for Bengaluru (Lat: {bengaluru_lat}, Lon: {bengaluru_lon})")
-print("-" * 60)
-    
-geo_times = times.calculate_geomagnetic_times(bengaluru_lat, bengaluru_lon)
-    
-for name, time_str in geo_times.items():
-    print(f"🕒 {name:<25}: {time_str}")
\ No newline at end of file
+# (lat, lon, alt_km, geodetic) of the stations compared in the time-series check
+STATIONS = (
+    (bengaluru_lat, bengaluru_lon, 0.0, False),
+    (64.82, -147.85, 0.2, True),
+    (-77.85, 166.67, 0.0, False),
+)
+STEP_S = 37.0  # not a divisor of the 10-minute solar nodes, so samples fall between them
+CHUNK_SIZE = 1000
+# Interpolation error bound of the 10-minute solar nodes, see times._interpolated_solar_terms
+MAX_SERIES_ERROR_H = 1e-8
+TIME_KEYS = ("Geographic Apparent Time", "Centered Dipole Time", "Eccentric Dipole Time")
+
+def main():
+    print(f"Calculating geomagnetic times for Bengaluru (Lat: {bengaluru_lat}, Lon: {bengaluru_lon})")
+    print("-" * 60)
+
+    geo_times = times.calculate_geomagnetic_times(bengaluru_lat, bengaluru_lon)
+
+    for name, time_str in geo_times.items():
+        print(f"🕒 {name:<25}: {time_str}")
+
+    failures = []
+    model = parameters.get_dipole_model_for_date("2015-06-01")
+    start, stop = np.datetime64("2015-06-01T00:00", "ns"), np.datetime64("2015-06-03T00:00", "ns")
+    print()
+    print(f"--- station_local_times vs calculate_geomagnetic_times_batch, {STEP_S:g} s steps over 2 days ---")
+    # Exact timestamps in the batch path, so the only difference is the node interpolation
+    previous = times.solar_cache_info()
+    times.configure_solar_cache(resolution_s=0)
+    try:
+        for lat, lon, alt, geodetic in STATIONS:
+            options = {"model": model, "alt_km": alt, "geodetic": geodetic}
+            chunks = list(times.station_local_times(lat, lon, start, stop, step_s=STEP_S, chunk_size=CHUNK_SIZE, **options))
+            utc = np.concatenate([chunk["UTC"] for chunk in chunks])
+            expected = times.calculate_geomagnetic_times_batch(lat, lon, utc, **options)
+            errors = []
+            for key in TIME_KEYS:
+                delta = np.concatenate([chunk[key] for chunk in chunks]) - expected[key]
+                errors.append(float(np.max(np.abs((delta + 12.0) % 24.0 - 12.0))))
+            print(f"({lat:7.2f}, {lon:8.2f}) {len(chunks)} chunks, {utc.size} samples: max error {max(errors):.1e} h")
+            if max(errors) > MAX_SERIES_ERROR_H:
+                failures.append(f"station ({lat}, {lon}) differs from the batch path by {max(errors):.1e} h")
+            if utc[0] != start or utc[-1] >= stop or np.any(np.diff(utc) != np.timedelta64(int(STEP_S * 1e9), "ns")):
+                failures.append(f"station ({lat}, {lon}) did not cover [start, stop) every {STEP_S:g} s")
+    finally:
+        times.configure_solar_cache(resolution_s=previous["resolution_s"], maxsize=previous["maxsize"])
+
+    print("-" * 60)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    print("Time check:", "FAILED" if failures else "passed")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
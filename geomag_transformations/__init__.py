@@ -1,10 +1,41 @@
 # geomag_transformations/__init__.py
 #This file makes the package easier to use by exposing the main functions at the top level.
 # Expose key functions for easy access
+#
+# Submodules are imported lazily on first attribute access (PEP 562), so
+# `import geomag_transformations` stays cheap for short-lived processes and
+# optional backends (PyEphem, pyarrow, netCDF4) load only when used.
 
-from . import coordinates
-from . import times
+import importlib
+
+_SUBMODULES = (
+    "benchmark",
+    "conjugate",
+    "coordinates",
+    "field",
+    "graticule",
+    "grid",
+    "igrf",
+    "instrumentation",
+    "parallel",
+    "parameters",
+    "pipeline",
+    "service",
+    "times",
+)
+
+__all__ = list(_SUBMODULES)
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBMODULES))
 
 # You can also expose specific functions directly if you prefer
 # from .times import calculate_geomagnetic_times
-# from .coordinates import transform_geographic_point
\ No newline at end of file
+# from .coordinates import transform_geographic_point
@@ -0,0 +1,228 @@
+# geomag_transformations/benchmark.py
+
+#This module benchmarks the public transforms (model setup, coordinate
+#transforms, field and local times), scalar and batch, over input sizes from 1
+#to 10^7 points. It reports median and maximum latency (a case runs only 3-7
+#timed repeats, too few for meaningful tail percentiles), throughput and peak
+#traced memory, writes the results as JSON and compares them against a saved
+#baseline, exiting non-zero when a case has slowed down.
+#
+#Usage:
+#    python -m geomag_transformations.benchmark --output current.json
+#    python -m geomag_transformations.benchmark --baseline baseline.json --tolerance 0.25
+
+import argparse
+import datetime
+import fnmatch
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from . import conjugate, coordinates, field, igrf, parameters, times
+
+DEFAULT_SIZES = (1, 10, 100, 1000, 10000, 100000, 1000000)
+FULL_SIZES = DEFAULT_SIZES + (10000000,)
+# Scalar APIs are looped once per point, so they only run up to this size
+SCALAR_MAX_SIZE = 1000
+DEFAULT_REPEAT = 7
+DEFAULT_TOLERANCE = 0.25
+# Cases stop repeating after this much wall time (the minimum of 3 repeats still runs)
+TIME_BUDGET_S = 5.0
+
+def _inputs(size, seed=0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2000-01-01T00:00:00", "ns")
+    span_ns = np.int64(25 * 365 * 86400) * 10**9
+    data = {
+        "lat": rng.uniform(-89.0, 89.0, size),
+        "lon": rng.uniform(-180.0, 180.0, size),
+        "alt": rng.uniform(0.0, 1000.0, size),
+        "utc": start + rng.integers(0, span_ns, size).astype("timedelta64[ns]"),
+    }
+    # Geographic Cartesian points (km), shape (size, 3), for the per-point Cartesian transforms
+    radius = parameters.R0 + data["alt"]
+    data["xyz"] = radius[:, np.newaxis] * coordinates.latlon_to_unit_vectors(data["lat"], data["lon"])
+    return data
+
+def _scalar_loop(func):
+    def run(data):
+        for lat, lon in zip(data["lat"].tolist(), data["lon"].tolist()):
+            func(lat, lon)
+    return run
+
+def _cartesian_loop(func, eccentric=False):
+    def run(data):
+        model = parameters.get_dipole_model()
+        extra = (model.r0, model.ed_params_geo) if eccentric else ()
+        for point in data["xyz"]:
+            func(point, model.rotation_matrix, *extra)
+    return run
+
+def _scalar_times(data):
+    model = parameters.get_dipole_model()
+    for lat, lon, utc in zip(data["lat"].tolist(), data["lon"].tolist(), data["utc"].astype("datetime64[us]").tolist()):
+        times.calculate_geomagnetic_times(lat, lon, model=model, utc=utc)
+
+# name -> (callable taking the input dict, whether it is a per-point scalar loop)
+CASES = {
+    "parameters.build_dipole_model": (lambda d: parameters.build_dipole_model(), True),
+    "parameters.get_dipole_model": (lambda d: parameters.get_dipole_model(), True),
+    "parameters.get_stacked_dipole_model": (lambda d: parameters.get_stacked_dipole_model(d["utc"]), False),
+    "coordinates.transform_geographic_point": (_scalar_loop(coordinates.transform_geographic_point), True),
+    "coordinates.geographic_to_cd": (_cartesian_loop(coordinates.geographic_to_cd), True),
+    "coordinates.cd_to_geographic": (_cartesian_loop(coordinates.cd_to_geographic), True),
+    "coordinates.geographic_to_ed": (_cartesian_loop(coordinates.geographic_to_ed, eccentric=True), True),
+    "coordinates.ed_to_geographic": (_cartesian_loop(coordinates.ed_to_geographic, eccentric=True), True),
+    "coordinates.geographic_to_cd_latlon": (lambda d: coordinates.geographic_to_cd_latlon(d["lat"], d["lon"]), False),
+    "coordinates.cd_to_geographic_latlon": (lambda d: coordinates.cd_to_geographic_latlon(d["lat"], d["lon"]), False),
+    "coordinates.geographic_to_ed_latlon": (lambda d: coordinates.geographic_to_ed_latlon(d["lat"], d["lon"], alt_km=d["alt"]), False),
+    "coordinates.ed_to_geographic_latlon": (lambda d: coordinates.ed_to_geographic_latlon(d["lat"], d["lon"], alt_km=d["alt"]), False),
+    "coordinates.geodetic_to_geocentric": (lambda d: coordinates.geodetic_to_geocentric(d["lat"], d["alt"]), False),
+    "field.calculate_geomagnetic_field": (_scalar_loop(field.calculate_geomagnetic_field), True),
+    "field.calculate_geomagnetic_field_batch": (lambda d: field.calculate_geomagnetic_field_batch(d["lat"], d["lon"], alt_km=d["alt"]), False),
+    "field.calculate_geomagnetic_field_fused": (lambda d: field.calculate_geomagnetic_field_fused(d["lat"], d["lon"], alt_km=d["alt"]), False),
+    "igrf.calculate_igrf_field_batch": (lambda d: igrf.calculate_igrf_field_batch(d["lat"], d["lon"], alt_km=d["alt"], date=2020.0), False),
+    "conjugate.calculate_cd_conjugate_points": (lambda d: conjugate.calculate_cd_conjugate_points(d["lat"], d["lon"], alt_km=d["alt"], footpoint_alt_km=110.0), False),
+    "conjugate.calculate_ed_conjugate_points": (lambda d: conjugate.calculate_ed_conjugate_points(d["lat"], d["lon"], alt_km=d["alt"], footpoint_alt_km=110.0), False),
+    "times.calculate_geomagnetic_times": (_scalar_times, True),
+    "times.calculate_geomagnetic_times_batch": (lambda d: times.calculate_geomagnetic_times_batch(d["lat"], d["lon"], d["utc"]), False),
+}
+
+def _sizes_for(name, sizes):
+    _, scalar = CASES[name]
+    if name in ("parameters.build_dipole_model", "parameters.get_dipole_model"):
+        return [1]  # independent of the number of points
+    return [n for n in sizes if not scalar or n <= SCALAR_MAX_SIZE]
+
+def run_case(name, size, repeat=DEFAULT_REPEAT):
+    """
+    Times one case at one size and returns its result record.
+
+    One untimed warm-up call is made first, then up to repeat timed calls
+    (at least 3, fewer when TIME_BUDGET_S runs out). Peak memory is measured
+    with tracemalloc in a separate call, so tracing does not distort timing.
+    """
+    func, _ = CASES[name]
+    data = _inputs(size)
+    func(data)
+
+    samples, started = [], time.perf_counter()
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        func(data)
+        samples.append(time.perf_counter() - t0)
+        if i >= 2 and time.perf_counter() - started > TIME_BUDGET_S:
+            break
+
+    tracemalloc.start()
+    try:
+        func(data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = np.array(samples)
+    p50 = np.median(samples)
+    return {
+        "name": name,
+        "size": size,
+        "repeats": len(samples),
+        "mean_s": float(samples.mean()),
+        "p50_s": float(p50),
+        "max_s": float(samples.max()),
+        "throughput_per_s": float(size / p50) if p50 > 0 else float("inf"),
+        "peak_memory_bytes": int(peak),
+    }
+
+def run_benchmarks(sizes=DEFAULT_SIZES, patterns=("*",), repeat=DEFAULT_REPEAT, progress=None):
+    """Runs every case matching one of the fnmatch patterns; returns the JSON-ready report."""
+    results = []
+    for name in CASES:
+        if not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        for size in _sizes_for(name, sizes):
+            result = run_case(name, size, repeat)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares the p50 latency of every case/size found in both reports.
+
+    Returns a list of (name, size, baseline_p50_s, current_p50_s, ratio,
+    regressed) rows, where regressed means the current p50 exceeds the
+    baseline p50 by more than tolerance (0.25 = 25 % slower).
+    """
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    rows = []
+    for result in report["results"]:
+        key = (result["name"], result["size"])
+        if key not in previous:
+            continue
+        before, after = previous[key]["p50_s"], result["p50_s"]
+        ratio = after / before if before > 0 else float("inf")
+        rows.append((result["name"], result["size"], before, after, ratio, ratio > 1.0 + tolerance))
+    return rows
+
+def _format_result(result):
+    return (
+        f"{result['name']:<42} n={result['size']:<9} p50={result['p50_s'] * 1e3:10.3f} ms "
+        f"max={result['max_s'] * 1e3:10.3f} ms {result['throughput_per_s']:14,.0f} pts/s "
+        f"peak={result['peak_memory_bytes'] / 2**20:9.1f} MiB"
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the geomag_transformations public API.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="point counts (default 1 ... 10^6)")
+    parser.add_argument("--full", action="store_true", help="include 10^7 points")
+    parser.add_argument("--cases", nargs="+", default=["*"], help="fnmatch patterns of case names, e.g. 'field.*'")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report to compare against; exits with status 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed relative p50 slowdown before a case counts as regressed")
+    parser.add_argument("--list", action="store_true", help="list the case names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return 0
+    sizes = args.sizes or (FULL_SIZES if args.full else DEFAULT_SIZES)
+    report = run_benchmarks(sizes, args.cases, args.repeat, progress=lambda r: print(_format_result(r), flush=True))
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+        print(f"Wrote {len(report['results'])} results to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        rows = compare_to_baseline(report, baseline, args.tolerance)
+        regressions = [row for row in rows if row[5]]
+        print(f"\nCompared {len(rows)} cases against {args.baseline} (tolerance {args.tolerance:.0%}):")
+        for name, size, before, after, ratio, regressed in rows:
+            flag = "REGRESSION" if regressed else "ok"
+            print(f"{name:<42} n={size:<9} {before * 1e3:10.3f} -> {after * 1e3:10.3f} ms  x{ratio:5.2f}  {flag}")
+        if regressions:
+            print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}.")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
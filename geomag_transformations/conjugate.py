@@ -0,0 +1,217 @@
+# geomag_transformations/conjugate.py
+
+#This module computes dipole field-line quantities for batches of points: the
+#L-value, the field-line apex and the magnetically conjugate footpoint, in
+#either the CD or the ED frame.
+#
+#A dipole field line through a point at distance r and magnetic latitude
+#lambda from the dipole centre satisfies r = L * r0 * cos^2(lambda) at
+#constant magnetic longitude, so L, the apex (lambda = 0, r = L * r0) and the
+#conjugate point (the same line in the other magnetic hemisphere) follow in
+#closed form without tracing. In the CD frame the dipole sits at the Earth's
+#centre and the footpoint on the sphere r0 + footpoint_alt_km is exact. The
+#ED dipole is offset from it, so the footpoint latitude on that sphere is
+#refined from the CD solution by a few vectorized Newton steps.
+
+import numpy as np
+
+from . import coordinates, instrumentation, parameters
+
+SYSTEMS = ("CD", "ED")
+# ED footpoint solver: ray-sphere corrections of the CD starting point, then
+# safeguarded Newton steps until |distance - target| <= tolerance * target
+FOOTPOINT_RAY_STEPS = 2
+FOOTPOINT_MAX_STEPS = 60
+FOOTPOINT_TOLERANCE = 1e-12
+# Secant steps fitting the footpoint to a WGS-84 height (geodetic=True)
+GEODETIC_ITERATIONS = 6
+GEODETIC_TOLERANCE_KM = 1e-9
+
+CONJUGATE_KEYS = (
+    "L-Shell", "Apex Radius (km)", "Apex Latitude (°)", "Apex Longitude (°)", "Apex Altitude (km)",
+    "Conjugate Latitude (°)", "Conjugate Longitude (°)",
+)
+
+def _ed_footpoint_latitude(L_r0, cos_lon, sin_lon, target_r, offset, start=None):
+    """
+    Dipole latitude u (rad, >= 0) where the ED field lines of L_r0 reach
+    distance target_r from the geographic centre, in a frame mirrored so that
+    the footpoint hemisphere is north. offset, shape (..., 3), is the dipole
+    centre seen from the geographic centre in that frame. NaN where the apex
+    of the line lies below target_r. start is an optional previous solution
+    for a nearby target_r to iterate from.
+    """
+    shape = np.broadcast_shapes(np.shape(L_r0), np.shape(cos_lon), np.shape(target_r), np.shape(offset)[:-1])
+    L_r0, cos_lon, sin_lon, target_r = (
+        np.broadcast_to(a, shape).ravel() for a in (L_r0, cos_lon, sin_lon, target_r)
+    )
+    offset = np.broadcast_to(offset, shape + (3,)).reshape(-1, 3)
+    ox, oy, oz = offset[:, 0], offset[:, 1], offset[:, 2]
+    o_horizontal = ox * cos_lon + oy * sin_lon
+
+    # Start from the CD solution and move it along its own direction onto the
+    # sphere (the ray-sphere step of coordinates.ed_to_geographic_latlon)
+    cos2 = np.minimum(target_r / L_r0, 1.0)
+    for _ in range(FOOTPOINT_RAY_STEPS if start is None else 0):
+        o_dot_n = np.sqrt(cos2) * o_horizontal + np.sqrt(1.0 - cos2) * oz
+        rho = -o_dot_n + np.sqrt(o_dot_n**2 - (ox * ox + oy * oy + oz * oz) + target_r**2)
+        cos2 = np.minimum(rho / L_r0, 1.0)
+    u = np.arccos(np.sqrt(cos2))
+    if start is not None:
+        start = np.broadcast_to(start, shape).ravel()
+        u = np.where(np.isnan(start), u, start)
+
+    # Safeguarded Newton on f(u) = |offset + p(u)| - target_r. f > 0 at the
+    # apex (u = 0) and f < 0 at the dipole centre (u = pi/2), so [lo, hi]
+    # always brackets the crossing and bisection replaces steps leaving it.
+    # Only the points not yet converged are iterated.
+    reaches = np.hypot(o_horizontal + L_r0, np.hypot(ox * sin_lon - oy * cos_lon, oz)) > target_r
+    lo, hi = np.zeros_like(u), np.full_like(u, np.pi / 2)
+    active = np.flatnonzero(reaches)
+    for _ in range(FOOTPOINT_MAX_STEPS):
+        if active.size == 0:
+            break
+        ua, La, ta = u[active], L_r0[active], target_r[active]
+        ca, sa = cos_lon[active], sin_lon[active]
+        cos_u, sin_u = np.cos(ua), np.sin(ua)
+        r = La * cos_u**2
+        x, y, z = ox[active] + r * cos_u * ca, oy[active] + r * cos_u * sa, oz[active] + r * sin_u
+        distance = np.sqrt(x * x + y * y + z * z)
+        f = distance - ta
+        done = np.abs(f) <= FOOTPOINT_TOLERANCE * ta
+
+        outside = f > 0
+        la, ha = np.where(outside, ua, lo[active]), np.where(outside, hi[active], ua)
+        # d/du of the dipole-frame point is L*r0 * (-3 cos^2 sin (cos lon, sin lon), cos (cos^2 - 2 sin^2))
+        slope = La * ((x * ca + y * sa) * (-3 * cos_u**2 * sin_u) + z * cos_u * (cos_u**2 - 2 * sin_u**2)) / distance
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = ua - f / slope
+        stepped = np.where((newton >= la) & (newton <= ha), newton, 0.5 * (la + ha))
+        u[active] = np.where(done, ua, stepped)
+        lo[active], hi[active] = la, ha
+        active = active[~(done | (ha - la <= 4 * np.finfo(float).eps))]
+
+    return np.where(reaches, u, np.nan).reshape(shape)
+
+def _footpoints(L_r0, cos_lon, sin_lon, hemisphere, target_r, offset, start=None):
+    """
+    Dipole-frame Cartesian footpoints, shape (..., 3), in the given
+    hemisphere (+1 / -1), and their |dipole latitude| (rad).
+    """
+    if offset is None:
+        cos2 = target_r / L_r0
+        with np.errstate(invalid="ignore"):
+            cos2 = np.where(cos2 <= 1.0, cos2, np.nan)
+        cos_u, sin_u = np.sqrt(cos2), np.sqrt(1.0 - cos2)
+        u = None
+    else:
+        mirrored = np.stack(np.broadcast_arrays(offset[..., 0], offset[..., 1], hemisphere * offset[..., 2]), axis=-1)
+        u = _ed_footpoint_latitude(L_r0, cos_lon, sin_lon, target_r, mirrored, start)
+        cos_u, sin_u = np.cos(u), np.sin(u)
+    r = L_r0 * cos_u**2
+    points = np.stack([r * cos_u * cos_lon, r * cos_u * sin_lon, hemisphere * r * sin_u], axis=-1)
+    return (points, u) if offset is None else (points + offset, u)
+
+def _conjugate_points(system, lat_deg, lon_deg, alt_km, footpoint_alt_km, model, geodetic):
+    if model is None:
+        model = parameters.get_dipole_model()
+    r0 = model.r0
+    lat_deg, r, _ = coordinates.geocentric_inputs(lat_deg, alt_km, r0, geodetic)
+    geo_points = r[..., np.newaxis] * coordinates.latlon_to_unit_vectors(lat_deg, lon_deg)
+    # Dipole centre relative to the geographic centre, in the dipole frame
+    if system == "CD":
+        offset = None
+        dipole_points = coordinates.rotate_points(geo_points, model.rotation_matrix)
+    else:
+        offset = r0 * np.asarray(model.ed_params_cd)
+        dipole_points = coordinates.rotate_points(geo_points - model.ed_offset_geo, model.rotation_matrix)
+
+    # L * r0 = r / cos^2(lat) = r^3 / horizontal^2, at constant magnetic longitude
+    x, y, z = dipole_points[..., 0], dipole_points[..., 1], dipole_points[..., 2]
+    horizontal = np.hypot(x, y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        L_r0 = (horizontal**2 + z**2)**1.5 / horizontal**2
+        cos_lon = np.where(horizontal > 0, x / horizontal, 1.0)
+        sin_lon = np.where(horizontal > 0, y / horizontal, 0.0)
+    hemisphere = np.where(z >= 0, -1.0, 1.0)
+
+    # Footpoint on the sphere r0 + footpoint_alt_km. For a WGS-84 height the
+    # sphere radius is refitted by secant steps on the footpoint's height.
+    footpoint_alt_km = np.asarray(footpoint_alt_km, dtype=float)
+    target_r = r0 + footpoint_alt_km
+    previous, foot_u = None, None
+    for _ in range(GEODETIC_ITERATIONS if geodetic else 1):
+        foot_points, foot_u = _footpoints(L_r0, cos_lon, sin_lon, hemisphere, target_r, offset, foot_u)
+        foot_geo = coordinates.rotate_points(foot_points, model.rotation_matrix_t)
+        if not geodetic:
+            break
+        conj_lat, conj_height = coordinates.cylindrical_to_geodetic(
+            np.hypot(foot_geo[..., 0], foot_geo[..., 1]), foot_geo[..., 2]
+        )
+        error = conj_height - footpoint_alt_km
+        if not np.any(np.abs(error) > GEODETIC_TOLERANCE_KM):
+            break
+        slope = 1.0
+        if previous is not None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                secant = (error - previous[1]) / (target_r - previous[0])
+            slope = np.where(np.isfinite(secant) & (secant > 0.1), secant, 1.0)
+        previous = (target_r, error)
+        target_r = target_r - error / slope
+    if geodetic:
+        conj_lon = np.degrees(np.arctan2(foot_geo[..., 1], foot_geo[..., 0]))
+    else:
+        conj_lat, conj_lon, _ = coordinates.cartesian_to_latlon(foot_geo)
+
+    apex_points = np.stack([L_r0 * cos_lon, L_r0 * sin_lon, np.zeros_like(L_r0)], axis=-1)
+    if offset is not None:
+        apex_points = apex_points + offset
+    apex_geo = coordinates.rotate_points(apex_points, model.rotation_matrix_t)
+    apex_lat, apex_lon, apex_r = coordinates.cartesian_to_latlon(apex_geo)
+    if geodetic:
+        apex_lat, apex_alt = coordinates.cylindrical_to_geodetic(
+            np.hypot(apex_geo[..., 0], apex_geo[..., 1]), apex_geo[..., 2]
+        )
+    else:
+        apex_alt = apex_r - r0
+
+    return dict(zip(CONJUGATE_KEYS, (
+        L_r0 / r0, L_r0, apex_lat, apex_lon, apex_alt, conj_lat, conj_lon,
+    )))
+
+@instrumentation.stage("conjugate.calculate_cd_conjugate_points")
+def calculate_cd_conjugate_points(lat_deg, lon_deg, *, alt_km=0.0, footpoint_alt_km=0.0, model=None, geodetic=False):
+    """
+    Vectorized centred-dipole field-line quantities for geographic points.
+
+    lat_deg, lon_deg and alt_km (height above the r0 sphere, or WGS-84
+    geodetic latitude/height with geodetic=True) are broadcast together.
+    Returns a dict with the keys of CONJUGATE_KEYS: the L-value, the apex
+    distance from the dipole centre (L * r0, km), the geographic position and
+    height of the apex, and the conjugate footpoint at footpoint_alt_km in
+    geographic coordinates. The footpoint is NaN where the field line does not
+    reach that height in the other hemisphere. model is an optional
+    parameters.DipoleModel, which may be a stacked per-sample model.
+    """
+    return _conjugate_points("CD", lat_deg, lon_deg, alt_km, footpoint_alt_km, model, geodetic)
+
+@instrumentation.stage("conjugate.calculate_ed_conjugate_points")
+def calculate_ed_conjugate_points(lat_deg, lon_deg, *, alt_km=0.0, footpoint_alt_km=0.0, model=None, geodetic=False):
+    """
+    Eccentric-dipole counterpart of calculate_cd_conjugate_points. L and the
+    apex radius are measured from the ED centre, and the footpoint lies on the
+    geographic sphere r0 + footpoint_alt_km (or the WGS-84 height).
+    """
+    return _conjugate_points("ED", lat_deg, lon_deg, alt_km, footpoint_alt_km, model, geodetic)
+
+def calculate_conjugate_points_batch(lat_deg, lon_deg, *, alt_km=0.0, system="CD", footpoint_alt_km=0.0,
+                                     model=None, geodetic=False):
+    """calculate_cd_conjugate_points or calculate_ed_conjugate_points, selected by system."""
+    system = system.upper()
+    if system not in SYSTEMS:
+        raise ValueError(f"Unknown dipole system: {system!r}; choose from {SYSTEMS}.")
+    if system == "CD":
+        compute = calculate_cd_conjugate_points
+    else:
+        compute = calculate_ed_conjugate_points
+    return compute(lat_deg, lon_deg, alt_km=alt_km, footpoint_alt_km=footpoint_alt_km, model=model, geodetic=geodetic)
@@ -2,7 +2,12 @@
 #This module contains all the coordinate transformation functions.
 
 import numpy as np
-from . import parameters
+from . import instrumentation, parameters
+
+# --- WGS-84 reference ellipsoid ---
+WGS84_A = 6378.137  # Equatorial radius in km
+WGS84_F = 1 / 298.257223563  # Flattening
+WGS84_E2 = WGS84_F * (2 - WGS84_F)  # First eccentricity squared
 
 def geographic_to_cd(geo_coords, rotation_matrix):
     """Transforms geographic cartesian coords to CD coords."""
@@ -22,18 +27,29 @@ def ed_to_geographic(ed_coords, rotation_matrix, r0, ed_params_geo):
     offset_geo_coords = rotation_matrix.T @ ed_coords
     return offset_geo_coords + r0 * ed_params_geo
 
-def transform_geographic_point(lat_deg, lon_deg):
+def rotate_points(points, rotation_matrix):
     """
-    A helper function to run a full transformation for a given lat/lon point.
+    Applies rotation_matrix @ p to every point of a (..., 3) array.
+
+    rotation_matrix may be a single (3, 3) matrix or a stacked (..., 3, 3)
+    array broadcastable against the points.
+    """
+    points = np.asarray(points)
+    if np.ndim(rotation_matrix) == 2:
+        return points @ np.transpose(rotation_matrix)
+    return (points[..., np.newaxis, :] @ np.swapaxes(rotation_matrix, -1, -2))[..., 0, :]
+
+@instrumentation.stage("coordinates.transform_geographic_point", batch_arg=None)
+def transform_geographic_point(lat_deg, lon_deg, *, model=None):
     """
-    g1_0, g1_1, h1_1 = -29775.0, -1851.0, 5411.0
-    g2_0, g2_1, h2_1 = -2136.0, 3058.0, -2278.0
-    g2_2, h2_2 = 1693.0, -380.0
-    r0 = 6371.2
+    A helper function to run a full transformation for a given lat/lon point.
 
-    B0, theta_n_rad, lambda_n_rad = parameters.calculate_cd_parameters(g1_0, g1_1, h1_1)
-    rot_matrix = parameters.calculate_rotation_matrix(theta_n_rad, lambda_n_rad)
-    ed_params_geo = parameters.calculate_ed_parameters(g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2, B0)
+    model is an optional parameters.DipoleModel; the IGRF-1990 model is used
+    when it is omitted.
+    """
+    if model is None:
+        model = parameters.get_dipole_model()
+    r0 = model.r0
 
     lat_rad, lon_rad = np.radians(lat_deg), np.radians(lon_deg)
     theta = np.pi / 2 - lat_rad
@@ -42,11 +58,146 @@ def transform_geographic_point(lat_deg, lon_deg):
     z = r0 * np.cos(theta)
     geo_point = np.array([x, y, z])
 
-    cd_point = geographic_to_cd(geo_point, rot_matrix)
-    ed_point = geographic_to_ed(geo_point, rot_matrix, r0, ed_params_geo)
+    cd_point = geographic_to_cd(geo_point, model.rotation_matrix)
+    ed_point = geographic_to_ed(geo_point, model.rotation_matrix, r0, model.ed_params_geo)
     
     return {
         "geo_coords": geo_point,
         "cd_coords": cd_point,
         "ed_coords": ed_point
-    }
\ No newline at end of file
+    }
+
+
+def geodetic_to_geocentric(lat_deg, alt_km=0.0):
+    """
+    Vectorized WGS-84 geodetic latitude (deg) and height (km) -> geocentric
+    latitude (deg) and geocentric radius (km). Longitude is unchanged.
+    """
+    lat_rad = np.radians(lat_deg)
+    sin_lat, cos_lat = np.sin(lat_rad), np.cos(lat_rad)
+    alt_km = np.asarray(alt_km, dtype=float)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat**2)  # Prime vertical radius of curvature
+    rho = (n + alt_km) * cos_lat
+    z = (n * (1 - WGS84_E2) + alt_km) * sin_lat
+    return np.degrees(np.arctan2(z, rho)), np.hypot(rho, z)
+
+def geocentric_to_geodetic(lat_deg, r_km):
+    """
+    Vectorized geocentric latitude (deg) and radius (km) -> WGS-84 geodetic
+    latitude (deg) and height (km), by Bowring's iteration (sub-millimetre
+    after three steps for points near the Earth).
+    """
+    lat_rad = np.radians(lat_deg)
+    return cylindrical_to_geodetic(r_km * np.cos(lat_rad), r_km * np.sin(lat_rad))
+
+def cylindrical_to_geodetic(rho, z):
+    """
+    WGS-84 geodetic latitude (deg) and height (km) of points at distance rho
+    (km) from the rotation axis and height z (km) above the equatorial plane.
+    """
+    geodetic_rad = np.arctan2(z, rho * (1 - WGS84_E2))
+    for _ in range(3):
+        sin_lat = np.sin(geodetic_rad)
+        n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat**2)
+        geodetic_rad = np.arctan2(z + WGS84_E2 * n * sin_lat, rho)
+    sin_lat, cos_lat = np.sin(geodetic_rad), np.cos(geodetic_rad)
+    n = WGS84_A / np.sqrt(1 - WGS84_E2 * sin_lat**2)
+    # Height from whichever of rho / z is better conditioned
+    alt_km = np.where(
+        np.abs(cos_lat) > 0.5,
+        rho / np.where(cos_lat == 0, 1.0, cos_lat) - n,
+        z / np.where(sin_lat == 0, 1.0, sin_lat) - n * (1 - WGS84_E2),
+    )
+    return np.degrees(geodetic_rad), alt_km
+
+def geocentric_inputs(lat_deg, alt_km, r0, geodetic=False):
+    """
+    Normalizes batch-API point inputs to geocentric latitude (deg) and radius.
+
+    With geodetic=False, lat_deg is geocentric and alt_km is the height above
+    the sphere of radius r0; with geodetic=True they are WGS-84 geodetic
+    latitude and height. Returns (geocentric_lat_deg, r_km, psi_rad), where
+    psi is the geodetic minus geocentric latitude (0 for spherical input).
+    """
+    lat_deg = np.asarray(lat_deg, dtype=float)
+    alt_km = np.asarray(alt_km, dtype=float)
+    if not geodetic:
+        lat_deg, alt_km = np.broadcast_arrays(lat_deg, alt_km)
+        return lat_deg, r0 + alt_km, np.zeros(lat_deg.shape)
+    geocentric_lat_deg, r_km = geodetic_to_geocentric(lat_deg, alt_km)
+    return geocentric_lat_deg, r_km, np.radians(lat_deg - geocentric_lat_deg)
+
+def latlon_to_unit_vectors(lat_deg, lon_deg):
+    """Unit Cartesian vectors, shape (..., 3), for broadcastable latitudes/longitudes in degrees."""
+    lat_rad, lon_rad = np.broadcast_arrays(np.radians(lat_deg), np.radians(lon_deg))
+    cos_lat = np.cos(lat_rad)
+    return np.stack([cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)], axis=-1)
+
+def cartesian_to_latlon(points):
+    """Latitude (deg), longitude (deg) and radius of a (..., 3) array of points."""
+    x, y, z = points[..., 0], points[..., 1], points[..., 2]
+    horizontal = np.hypot(x, y)
+    return np.degrees(np.arctan2(z, horizontal)), np.degrees(np.arctan2(y, x)), np.hypot(horizontal, z)
+
+@instrumentation.stage("coordinates.geographic_to_cd_latlon")
+def geographic_to_cd_latlon(lat_deg, lon_deg, *, model=None, alt_km=0.0, geodetic=False):
+    """
+    Vectorized geographic lat/lon (deg) -> CD magnetic lat/lon (deg).
+
+    With geodetic=True, lat_deg/alt_km are WGS-84 geodetic latitude/height.
+    """
+    if model is None:
+        model = parameters.get_dipole_model()
+    if geodetic:
+        lat_deg, _, _ = geocentric_inputs(lat_deg, alt_km, model.r0, geodetic)
+    cd_points = rotate_points(latlon_to_unit_vectors(lat_deg, lon_deg), model.rotation_matrix)
+    cd_lat, cd_lon, _ = cartesian_to_latlon(cd_points)
+    return cd_lat, cd_lon
+
+@instrumentation.stage("coordinates.cd_to_geographic_latlon")
+def cd_to_geographic_latlon(cd_lat_deg, cd_lon_deg, *, model=None):
+    """Vectorized CD magnetic lat/lon (deg) -> geographic lat/lon (deg)."""
+    if model is None:
+        model = parameters.get_dipole_model()
+    geo_points = rotate_points(latlon_to_unit_vectors(cd_lat_deg, cd_lon_deg), model.rotation_matrix_t)
+    lat, lon, _ = cartesian_to_latlon(geo_points)
+    return lat, lon
+
+@instrumentation.stage("coordinates.geographic_to_ed_latlon")
+def geographic_to_ed_latlon(lat_deg, lon_deg, *, alt_km=0.0, model=None, geodetic=False):
+    """
+    Vectorized geographic lat/lon (deg) at altitude alt_km above the r0 sphere
+    -> ED magnetic lat/lon (deg) and distance from the ED centre (km).
+
+    With geodetic=True, lat_deg/alt_km are WGS-84 geodetic latitude/height.
+    """
+    if model is None:
+        model = parameters.get_dipole_model()
+    lat_deg, r, _ = geocentric_inputs(lat_deg, alt_km, model.r0, geodetic)
+    geo_points = r[..., np.newaxis] * latlon_to_unit_vectors(lat_deg, lon_deg)
+    ed_points = rotate_points(geo_points - model.ed_offset_geo, model.rotation_matrix)
+    return cartesian_to_latlon(ed_points)
+
+@instrumentation.stage("coordinates.ed_to_geographic_latlon")
+def ed_to_geographic_latlon(ed_lat_deg, ed_lon_deg, *, alt_km=0.0, model=None):
+    """
+    Vectorized ED magnetic lat/lon (deg) -> geographic lat/lon (deg).
+
+    The ED direction is a ray from the eccentric dipole centre. It is
+    re-projected onto the geographic sphere of radius r0 + alt_km by solving
+    |c + t*u| = r for the ray parameter t, where c is the ED offset and u the
+    ray direction, both in the geographic frame. This is the exact inverse of
+    geographic_to_ed_latlon at the same altitude.
+    """
+    if model is None:
+        model = parameters.get_dipole_model()
+    directions = rotate_points(latlon_to_unit_vectors(ed_lat_deg, ed_lon_deg), model.rotation_matrix_t)
+    centre = model.ed_offset_geo
+    r = model.r0 + np.asarray(alt_km, dtype=float)
+
+    c_dot_u = np.sum(centre * directions, axis=-1)
+    c_squared = np.sum(centre * centre, axis=-1)
+    t = -c_dot_u + np.sqrt(c_dot_u**2 - c_squared + r**2)
+    geo_points = centre + t[..., np.newaxis] * directions
+    lat, lon, _ = cartesian_to_latlon(geo_points)
+    return lat, lon
@@ -1,6 +1,6 @@
 #geomag_transformations/field.py
 import numpy as np
-from . import parameters, coordinates
+from . import parameters, coordinates, instrumentation
 
 def cartesian_to_spherical(x, y, z):
     """Converts Cartesian coordinates to spherical coordinates (radius, theta, phi)."""
@@ -9,20 +9,19 @@ def cartesian_to_spherical(x, y, z):
     phi = np.arctan2(y, x)   # Longitude / Azimuth
     return r, theta, phi
 
-def calculate_geomagnetic_field(lat_deg, lon_deg):
+@instrumentation.stage("field.calculate_geomagnetic_field", batch_arg=None)
+def calculate_geomagnetic_field(lat_deg, lon_deg, *, model=None):
     """
     Calculates geomagnetic field components, dip, and declination.
     Ref: Section 6 of the paper.
-    """
-    # --- 1. Get IGRF-1990 Parameters ---
-    g1_0, g1_1, h1_1 = parameters.G1_0, parameters.G1_1, parameters.H1_1
-    g2_0, g2_1, h2_1 = parameters.G2_0, parameters.G2_1, parameters.H2_1
-    g2_2, h2_2 = parameters.G2_2, parameters.H2_2
-    r0 = parameters.R0
 
-    B0, theta_n_rad, lambda_n_rad = parameters.calculate_cd_parameters(g1_0, g1_1, h1_1)
-    rot_matrix = parameters.calculate_rotation_matrix(theta_n_rad, lambda_n_rad)
-    ed_params_geo = parameters.calculate_ed_parameters(g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2, B0)
+    model is an optional parameters.DipoleModel (IGRF-1990 when omitted).
+    """
+    # --- 1. Get Dipole Model Parameters (IGRF-1990 by default) ---
+    if model is None:
+        model = parameters.get_dipole_model()
+    r0, B0 = model.r0, model.B0
+    rot_matrix, ed_params_geo = model.rotation_matrix, model.ed_params_geo
 
     # --- 2. Get Point's Coordinates in All Frames ---
     # Convert geographic point to geographic cartesian
@@ -56,7 +55,7 @@ def calculate_geomagnetic_field(lat_deg, lon_deg):
 
     # Step 4b: ED Cartesian -> Geographic Cartesian (Eq. 46)
     # This uses the inverse (transpose) of the main rotation matrix
-    B_geo_cartesian = rot_matrix.T @ B_ED_cartesian
+    B_geo_cartesian = model.rotation_matrix_t @ B_ED_cartesian
 
     # Step 4c: Geographic Cartesian -> Geographic Spherical (Eq. 47)
     sin_t, cos_t = np.sin(geo_theta_rad), np.cos(geo_theta_rad)
@@ -82,4 +81,219 @@ def calculate_geomagnetic_field(lat_deg, lon_deg):
         "B_lambda (nT)": B_lambda,
         "Dip Angle (°)": np.degrees(dip_rad),
         "Declination Angle (°)": np.degrees(declination_rad)
-    }
\ No newline at end of file
+    }
+
+
+@instrumentation.stage("field.calculate_geomagnetic_field_batch")
+def calculate_geomagnetic_field_batch(lat_deg, lon_deg, *, alt_km=0.0, model=None, dates=None, geodetic=False):
+    """
+    Vectorized form of calculate_geomagnetic_field for arrays of points.
+
+    lat_deg, lon_deg and alt_km may be scalars or arrays of any mutually
+    broadcastable shape. The Eq. 44 and Eq. 47 matrices are built as stacked
+    (..., 3, 3) arrays and applied with einsum, so no Python loop runs per
+    point. Returns a dict with the keys of calculate_geomagnetic_field plus
+    "B_north (nT)", "B_east (nT)" and "B_down (nT)", each holding an array of
+    the broadcast shape.
+
+    alt_km is the height above the r0 sphere, so the dipole term uses the
+    point's true distance. With geodetic=True, lat_deg/alt_km are WGS-84
+    geodetic latitude/height; north/east/down and dip/declination are then
+    given in the local geodetic frame, while Br/B_theta/B_lambda stay
+    geocentric spherical components. model is an optional
+    parameters.DipoleModel (IGRF-1990 when omitted). Alternatively, dates
+    (broadcastable to the points) selects a time-interpolated IGRF model per
+    point, see parameters.get_stacked_dipole_model.
+    """
+    if dates is not None:
+        model = parameters.get_stacked_dipole_model(dates)
+    # --- 1. Get Dipole Model Parameters (IGRF-1990 by default) ---
+    if model is None:
+        model = parameters.get_dipole_model()
+    r0, B0 = model.r0, model.B0
+
+    # --- 2. Geographic Cartesian points, shape (..., 3) ---
+    lat_deg, r, psi_rad = coordinates.geocentric_inputs(lat_deg, alt_km, r0, geodetic)
+    lat_deg, lon_deg, r, psi_rad = np.broadcast_arrays(lat_deg, np.asarray(lon_deg, dtype=float), r, psi_rad)
+    lat_rad, lon_rad = np.radians(lat_deg), np.radians(lon_deg)
+    geo_theta_rad = np.pi / 2 - lat_rad
+    sin_t, cos_t = np.sin(geo_theta_rad), np.cos(geo_theta_rad)
+    sin_l, cos_l = np.sin(lon_rad), np.cos(lon_rad)
+    geo_points = np.stack([r * sin_t * cos_l, r * sin_t * sin_l, r * cos_t], axis=-1)
+
+    ed_points = coordinates.rotate_points(geo_points - model.ed_offset_geo, model.rotation_matrix)
+    R, ED_theta_rad, ED_phi_rad = cartesian_to_spherical(ed_points[..., 0], ed_points[..., 1], ed_points[..., 2])
+
+    # --- 3. Field in ED Spherical Coordinates (Eq. 43) ---
+    scale = B0 * (r0 / R)**3
+    sin_T, cos_T = np.sin(ED_theta_rad), np.cos(ED_theta_rad)
+    sin_P, cos_P = np.sin(ED_phi_rad), np.cos(ED_phi_rad)
+    B_ED_spherical = np.stack([-2 * scale * cos_T, -scale * sin_T, np.zeros_like(scale)], axis=-1)
+
+    # --- 4. Stacked Eq. 44 / Eq. 46 / Eq. 47 transforms ---
+    zeros = np.zeros_like(sin_T)
+    trans_matrix_44 = np.stack([
+        np.stack([sin_T * cos_P, cos_T * cos_P, -sin_P], axis=-1),
+        np.stack([sin_T * sin_P, cos_T * sin_P, cos_P], axis=-1),
+        np.stack([cos_T, -sin_T, zeros], axis=-1),
+    ], axis=-2)
+    B_ED_cartesian = np.einsum('...ij,...j->...i', trans_matrix_44, B_ED_spherical)
+
+    B_geo_cartesian = coordinates.rotate_points(B_ED_cartesian, model.rotation_matrix_t)
+
+    trans_matrix_47 = np.stack([
+        np.stack([sin_t * cos_l, sin_t * sin_l, cos_t], axis=-1),
+        np.stack([cos_t * cos_l, cos_t * sin_l, -sin_t], axis=-1),
+        np.stack([-sin_l, cos_l, zeros], axis=-1),
+    ], axis=-2)
+    B_geo_spherical = np.einsum('...ij,...j->...i', trans_matrix_47, B_geo_cartesian)
+    B_r, B_theta, B_lambda = B_geo_spherical[..., 0], B_geo_spherical[..., 1], B_geo_spherical[..., 2]
+
+    return local_field_outputs(B_r, B_theta, B_lambda, psi_rad)
+
+def local_field_outputs(B_r, B_theta, B_lambda, psi_rad=0.0):
+    """
+    Builds the output dict of calculate_geomagnetic_field_batch from the
+    geocentric spherical components (nT). psi_rad is the geodetic minus
+    geocentric latitude that tilts north/east/down into the geodetic frame.
+    """
+    # --- 5. Local north/east/down, rotated by psi into the geodetic frame ---
+    cos_psi, sin_psi = np.cos(psi_rad), np.sin(psi_rad)
+    B_north = -B_theta * cos_psi - B_r * sin_psi
+    B_east = B_lambda
+    B_down = B_theta * sin_psi - B_r * cos_psi
+
+    # --- 6. Dip (Eq. 50) and Declination (Eq. 51) ---
+    # With psi = 0 these reduce to atan2(-Br, H) and atan2(B_lambda, B_theta)
+    horizontal_field = np.sqrt(B_north**2 + B_east**2)
+    dip_rad = np.arctan2(B_down, horizontal_field)
+    declination_rad = np.arctan2(B_east, -B_north)
+
+    return {
+        "Br (nT)": B_r,
+        "B_theta (nT)": B_theta,
+        "B_lambda (nT)": B_lambda,
+        "B_north (nT)": B_north,
+        "B_east (nT)": B_east,
+        "B_down (nT)": B_down,
+        "Dip Angle (°)": np.degrees(dip_rad),
+        "Declination Angle (°)": np.degrees(declination_rad)
+    }
+
+# Row order of the out= buffer of calculate_geomagnetic_field_fused
+FIELD_KEYS = (
+    "Br (nT)", "B_theta (nT)", "B_lambda (nT)", "B_north (nT)", "B_east (nT)", "B_down (nT)",
+    "Dip Angle (°)", "Declination Angle (°)",
+)
+
+@instrumentation.stage("field.calculate_geomagnetic_field_fused")
+def calculate_geomagnetic_field_fused(lat_deg, lon_deg, *, alt_km=0.0, model=None, dates=None, geodetic=False, out=None):
+    """
+    Single-pass form of calculate_geomagnetic_field_batch.
+
+    The ED dipole field is evaluated directly in the geographic frame from
+    the vector form of Eq. 43,
+        B = -B0 (r0 / |D|)^3 [3 (m.D^) D^ - m],
+    where D is the point minus the ED centre and m the dipole axis (the
+    third row of the rotation matrix). The result is projected onto the
+    local r/theta/lambda directions, so no ED spherical angles or Eq. 44/47
+    matrices are formed. All work is done in place in out, an optional
+    float64 buffer of shape (8,) + broadcast shape whose rows follow
+    FIELD_KEYS. Returns a dict of views into out with the same keys and
+    values as calculate_geomagnetic_field_batch.
+    """
+    if dates is not None:
+        model = parameters.get_stacked_dipole_model(dates)
+    if model is None:
+        model = parameters.get_dipole_model()
+
+    lat_deg, r, psi_rad = coordinates.geocentric_inputs(lat_deg, alt_km, model.r0, geodetic)
+    lon_deg = np.asarray(lon_deg, dtype=float)
+    B0 = np.asarray(model.B0, dtype=float)
+    shape = np.broadcast_shapes(lat_deg.shape, lon_deg.shape, r.shape, B0.shape)
+    if out is None:
+        out = np.empty((len(FIELD_KEYS),) + shape)
+    elif out.shape != (len(FIELD_KEYS),) + shape or out.dtype != np.float64:
+        raise ValueError(f"out must be a float64 array of shape {(len(FIELD_KEYS),) + shape}, got {out.dtype} {out.shape}.")
+    rows = [out[i, ...] for i in range(len(FIELD_KEYS))]
+    B_r, B_theta, B_lambda, B_north, B_east, B_down, dip, declination = rows
+
+    m_x, m_y, m_z = (model.rotation_matrix[..., 2, i] for i in range(3))
+    c_x, c_y, c_z = (model.ed_offset_geo[..., i] for i in range(3))
+
+    # --- 1. Point trig: the only sin/cos evaluations ---
+    lat_rad, lon_rad = np.radians(lat_deg), np.radians(lon_deg)
+    sin_lat, cos_lat = np.broadcast_to(np.sin(lat_rad), shape), np.broadcast_to(np.cos(lat_rad), shape)
+    sin_lon, cos_lon = np.broadcast_to(np.sin(lon_rad), shape), np.broadcast_to(np.cos(lon_rad), shape)
+    work = np.empty(shape)
+
+    # --- 2. D = p - c_ED, built in the north/east/down rows ---
+    D_x, D_y, D_z = B_north, B_east, B_down
+    np.multiply(cos_lat, cos_lon, out=D_x)
+    D_x *= r
+    D_x -= c_x
+    np.multiply(cos_lat, sin_lon, out=D_y)
+    D_y *= r
+    D_y -= c_y
+    np.multiply(sin_lat, r, out=D_z)
+    D_z -= c_z
+
+    # --- 3. B = s (k D - m), s = -B0 r0^3 / |D|^3, k = 3 (m.D) / |D|^2 ---
+    D2, k = dip, declination
+    np.multiply(D_x, D_x, out=D2)
+    np.multiply(D_y, D_y, out=work)
+    D2 += work
+    np.multiply(D_z, D_z, out=work)
+    D2 += work
+    np.multiply(D_x, m_x, out=k)
+    np.multiply(D_y, m_y, out=work)
+    k += work
+    np.multiply(D_z, m_z, out=work)
+    k += work
+    k *= 3.0
+    k /= D2
+    scale = D2
+    np.power(D2, -1.5, out=scale)
+    scale *= -B0 * model.r0**3
+    for D_i, m_i in ((D_x, m_x), (D_y, m_y), (D_z, m_z)):
+        D_i *= k
+        D_i -= m_i
+        D_i *= scale
+    B_x, B_y, B_z = D_x, D_y, D_z
+
+    # --- 4. Local spherical components ---
+    np.multiply(B_y, cos_lon, out=B_lambda)
+    np.multiply(B_x, sin_lon, out=work)
+    B_lambda -= work
+    B_h = work
+    np.multiply(B_x, cos_lon, out=B_h)
+    np.multiply(B_y, sin_lon, out=declination)
+    B_h += declination
+    np.multiply(cos_lat, B_h, out=B_r)
+    np.multiply(sin_lat, B_z, out=declination)
+    B_r += declination
+    np.multiply(sin_lat, B_h, out=B_theta)
+    np.multiply(cos_lat, B_z, out=declination)
+    B_theta -= declination
+
+    # --- 5. North/east/down (tilted by psi for geodetic input), dip and declination ---
+    np.copyto(B_east, B_lambda)
+    if geodetic:
+        cos_psi, sin_psi = np.cos(psi_rad), np.sin(psi_rad)
+        np.multiply(B_theta, -cos_psi, out=B_north)
+        np.multiply(B_r, sin_psi, out=work)
+        B_north -= work
+        np.multiply(B_theta, sin_psi, out=B_down)
+        np.multiply(B_r, cos_psi, out=work)
+        B_down -= work
+    else:
+        np.negative(B_theta, out=B_north)
+        np.negative(B_r, out=B_down)
+    np.hypot(B_north, B_east, out=work)
+    np.arctan2(B_down, work, out=dip)
+    np.degrees(dip, out=dip)
+    np.negative(B_north, out=work)
+    np.arctan2(B_east, work, out=declination)
+    np.degrees(declination, out=declination)
+
+    return dict(zip(FIELD_KEYS, rows))
@@ -0,0 +1,168 @@
+# geomag_transformations/graticule.py
+
+#This module generates CD and ED graticules (lines of constant magnetic
+#latitude and longitude) and the dipole pole positions in geographic
+#coordinates, for drawing map overlays.
+#
+#All lines of a graticule are sampled and transformed in a single vectorized
+#call to coordinates.cd_to_geographic_latlon or ed_to_geographic_latlon, and
+#the result is cached per (system, model, spacing, resolution, altitude), so
+#tile servers rendering many overlays never recompute it.
+
+import functools
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import coordinates, parameters
+
+SYSTEMS = ("CD", "ED")
+DEFAULT_LAT_SPACING_DEG = 10.0
+DEFAULT_LON_SPACING_DEG = 30.0
+DEFAULT_RESOLUTION_DEG = 1.0
+GRATICULE_CACHE_SIZE = 64
+
+@dataclass(frozen=True, eq=False)
+class Graticule:
+    """
+    Geographic positions of a CD or ED graticule; all arrays are read-only.
+
+    parallel_lats/parallel_lons have shape (len(latitudes), n) and trace the
+    lines of constant magnetic latitude `latitudes`, sampled every
+    resolution_deg of magnetic longitude from -180 to 180. The
+    meridian_lats/meridian_lons arrays, shape (len(longitudes), m), do the
+    same for the lines of constant magnetic longitude from -90 to 90.
+    pole_lats/pole_lons hold the (north, south) dipole poles.
+    """
+    system: str
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    parallel_lats: np.ndarray
+    parallel_lons: np.ndarray
+    meridian_lats: np.ndarray
+    meridian_lons: np.ndarray
+    pole_lats: np.ndarray
+    pole_lons: np.ndarray
+
+    def to_geojson(self):
+        """
+        Returns the graticule as a GeoJSON FeatureCollection dict.
+
+        Each line is a LineString or, if it crosses the antimeridian, a
+        MultiLineString split there. Properties are system, kind ("parallel"
+        or "meridian") and value (deg). The poles are Point features with
+        kind "north_pole" / "south_pole".
+        """
+        features = []
+        for kind, values, lats, lons in (
+            ("parallel", self.latitudes, self.parallel_lats, self.parallel_lons),
+            ("meridian", self.longitudes, self.meridian_lats, self.meridian_lons),
+        ):
+            for value, line_lats, line_lons in zip(values.tolist(), lats, lons):
+                segments = _split_at_antimeridian(line_lats, line_lons)
+                geometry = (
+                    {"type": "LineString", "coordinates": segments[0]} if len(segments) == 1
+                    else {"type": "MultiLineString", "coordinates": segments}
+                )
+                features.append({
+                    "type": "Feature",
+                    "geometry": geometry,
+                    "properties": {"system": self.system, "kind": kind, "value": value},
+                })
+        for kind, lat, lon in zip(("north_pole", "south_pole"), self.pole_lats.tolist(), self.pole_lons.tolist()):
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {"system": self.system, "kind": kind},
+            })
+        return {"type": "FeatureCollection", "features": features}
+
+def _split_at_antimeridian(lats, lons):
+    """Splits one line into [lon, lat] segments where it jumps across +-180 deg, adding the crossing point."""
+    points = np.column_stack([lons, lats]).tolist()
+    segments, start, lead = [], 0, []
+    for j in np.flatnonzero(np.abs(np.diff(lons)) > 180.0):
+        # Unwrap the next point beside the current one and interpolate the crossing latitude
+        edge = 180.0 if lons[j] > 0 else -180.0
+        next_lon = lons[j + 1] + 2 * edge
+        w = (edge - lons[j]) / (next_lon - lons[j])
+        crossing_lat = float(lats[j] + w * (lats[j + 1] - lats[j]))
+        segments.append(lead + points[start:j + 1] + [[edge, crossing_lat]])
+        lead, start = [[-edge, crossing_lat]], j + 1
+    segments.append(lead + points[start:])
+    return segments
+
+def _line_samples(stop_deg, resolution_deg):
+    count = int(np.ceil(2 * stop_deg / resolution_deg)) + 1
+    return np.linspace(-stop_deg, stop_deg, count)
+
+def _read_only(array):
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+@functools.lru_cache(maxsize=GRATICULE_CACHE_SIZE)
+def _cached_graticule(system, model, lat_spacing_deg, lon_spacing_deg, resolution_deg, alt_km):
+    latitudes = np.arange(-90.0 + lat_spacing_deg, 90.0 - 1e-9, lat_spacing_deg)
+    longitudes = np.arange(-180.0, 180.0 - 1e-9, lon_spacing_deg)
+    along_parallel = _line_samples(180.0, resolution_deg)
+    along_meridian = _line_samples(90.0, resolution_deg)
+
+    # Every parallel, meridian and both poles in one transform call
+    magnetic_lats = np.concatenate([
+        np.repeat(latitudes, along_parallel.size), np.tile(along_meridian, longitudes.size), [90.0, -90.0],
+    ])
+    magnetic_lons = np.concatenate([
+        np.tile(along_parallel, latitudes.size), np.repeat(longitudes, along_meridian.size), [0.0, 0.0],
+    ])
+    if system == "CD":
+        lats, lons = coordinates.cd_to_geographic_latlon(magnetic_lats, magnetic_lons, model=model)
+    else:
+        lats, lons = coordinates.ed_to_geographic_latlon(magnetic_lats, magnetic_lons, alt_km=alt_km, model=model)
+
+    n_parallel = latitudes.size * along_parallel.size
+    n_meridian = longitudes.size * along_meridian.size
+    parallel_shape = (latitudes.size, along_parallel.size)
+    meridian_shape = (longitudes.size, along_meridian.size)
+    return Graticule(
+        system=system,
+        latitudes=_read_only(latitudes),
+        longitudes=_read_only(longitudes),
+        parallel_lats=_read_only(lats[:n_parallel].reshape(parallel_shape)),
+        parallel_lons=_read_only(lons[:n_parallel].reshape(parallel_shape)),
+        meridian_lats=_read_only(lats[n_parallel:n_parallel + n_meridian].reshape(meridian_shape)),
+        meridian_lons=_read_only(lons[n_parallel:n_parallel + n_meridian].reshape(meridian_shape)),
+        pole_lats=_read_only(lats[-2:]),
+        pole_lons=_read_only(lons[-2:]),
+    )
+
+def get_graticule(system="CD", model=None, lat_spacing_deg=DEFAULT_LAT_SPACING_DEG,
+                  lon_spacing_deg=DEFAULT_LON_SPACING_DEG, resolution_deg=DEFAULT_RESOLUTION_DEG, alt_km=0.0):
+    """
+    Returns the cached Graticule of the CD or ED system for a model
+    (IGRF-1990 when omitted).
+
+    Parallels are drawn every lat_spacing_deg of magnetic latitude
+    (excluding the poles) and meridians every lon_spacing_deg of magnetic
+    longitude. Both are sampled every resolution_deg along the line. ED lines
+    are projected onto the sphere r0 + alt_km.
+    """
+    system = system.upper()
+    if system not in SYSTEMS:
+        raise ValueError(f"Unknown graticule system: {system!r}; choose from {SYSTEMS}.")
+    if model is None:
+        model = parameters.get_dipole_model()
+    return _cached_graticule(
+        system, model, float(lat_spacing_deg), float(lon_spacing_deg), float(resolution_deg),
+        float(alt_km) if system == "ED" else 0.0,
+    )
+
+@functools.lru_cache(maxsize=GRATICULE_CACHE_SIZE)
+def _cached_geojson(graticule):
+    return json.dumps(graticule.to_geojson())
+
+def get_graticule_geojson(system="CD", model=None, lat_spacing_deg=DEFAULT_LAT_SPACING_DEG,
+                          lon_spacing_deg=DEFAULT_LON_SPACING_DEG, resolution_deg=DEFAULT_RESOLUTION_DEG, alt_km=0.0):
+    """get_graticule serialized as a GeoJSON string, cached alongside the arrays."""
+    return _cached_geojson(get_graticule(system, model, lat_spacing_deg, lon_spacing_deg, resolution_deg, alt_km))
@@ -0,0 +1,271 @@
+# geomag_transformations/grid.py
+
+#This module provides a precomputed global lookup grid for fast, interpolated
+#field and coordinate queries.
+#
+#The grid holds, per node of a regular lat/lon(/altitude) grid, the geographic
+#field components and the CD and ED unit direction vectors. Queries interpolate
+#these smooth quantities bilinearly (linearly in altitude) and derive dip,
+#declination and CD/ED latitude/longitude from the interpolated values, which
+#avoids the cusps that latitude itself has at the dipole poles.
+#
+#Maximum error versus the analytic path, measured with estimate_max_error for
+#the default 0.5 degree surface grid (IGRF-1990):
+#    Dip angle                    < 0.001 deg
+#    Declination                  < 0.01 deg   (|lat| <= 88 deg and H >= 2000 nT)
+#    CD / ED latitude             < 0.001 deg
+#    CD / ED longitude            < 0.01 deg   (|magnetic lat| <= 89 deg)
+#    Field components             < 1.2 nT
+#Errors scale with the square of the grid spacing. With altitude levels at
+#most 50 km apart the same bounds hold up to the top level (100 km spacing
+#roughly doubles the declination/ED longitude error). Declination and magnetic
+#longitude are ill-conditioned near the geographic and magnetic poles, which
+#is why they carry the restrictions above.
+
+import functools
+import hashlib
+import json
+import os
+import uuid
+from dataclasses import dataclass
+
+import numpy as np
+from . import parameters, coordinates, field
+
+GRID_FIELDS = ("br", "b_theta", "b_lambda", "cd_x", "cd_y", "cd_z", "ed_x", "ed_y", "ed_z")
+DEFAULT_RESOLUTION_DEG = 0.5
+
+@dataclass(frozen=True, eq=False)
+class LookupGrid:
+    """
+    Precomputed grid for one dipole model.
+
+    values has shape (len(GRID_FIELDS), n_alt, n_lat, n_lon) and may be a
+    read-only memory map. Latitude nodes run from -90 to 90 and longitude
+    nodes from -180 to 180 inclusive, both spaced resolution_deg apart. Field
+    components are stored scaled by (r / r0)**3 so that they vary slowly with
+    altitude.
+    """
+    values: np.ndarray
+    resolution_deg: float
+    altitudes_km: np.ndarray
+    coefficients: tuple
+    r0: float
+
+    @property
+    def model(self):
+        """The parameters.DipoleModel the grid was built from."""
+        return parameters.get_dipole_model(self.coefficients, self.r0)
+
+def _grid_axes(resolution_deg):
+    n_lat = 180.0 / resolution_deg
+    n_lon = 360.0 / resolution_deg
+    if not (np.isclose(n_lat, round(n_lat)) and np.isclose(n_lon, round(n_lon))):
+        raise ValueError("resolution_deg must divide 180 degrees evenly.")
+    return np.linspace(-90.0, 90.0, int(round(n_lat)) + 1), np.linspace(-180.0, 180.0, int(round(n_lon)) + 1)
+
+def _grid_values(lat_deg, lon_deg, alt_km, model):
+    """Analytic GRID_FIELDS values at broadcastable points, stacked on axis 0."""
+    f = field.calculate_geomagnetic_field_batch(lat_deg, lon_deg, alt_km=alt_km, model=model)
+    scale = ((model.r0 + alt_km) / model.r0)**3
+    unit = coordinates.latlon_to_unit_vectors(lat_deg, lon_deg)
+    cd_vectors = coordinates.rotate_points(unit, model.rotation_matrix)
+    geo_points = (model.r0 + np.asarray(alt_km))[..., np.newaxis] * unit
+    ed_vectors = coordinates.rotate_points(geo_points - model.ed_offset_geo, model.rotation_matrix)
+    ed_vectors /= np.linalg.norm(ed_vectors, axis=-1, keepdims=True)
+    return np.stack([
+        f["Br (nT)"] * scale, f["B_theta (nT)"] * scale, f["B_lambda (nT)"] * scale,
+        cd_vectors[..., 0], cd_vectors[..., 1], cd_vectors[..., 2],
+        ed_vectors[..., 0], ed_vectors[..., 1], ed_vectors[..., 2],
+    ])
+
+def build_lookup_grid(model=None, resolution_deg=DEFAULT_RESOLUTION_DEG, altitudes_km=(0.0,)):
+    """Evaluates the analytic transforms on every grid node and returns a LookupGrid."""
+    if model is None:
+        model = parameters.get_dipole_model()
+    lats, lons = _grid_axes(resolution_deg)
+    altitudes_km = np.sort(np.asarray(altitudes_km, dtype=float).ravel())
+    lat_grid, lon_grid = np.meshgrid(lats, lons, indexing='ij')
+
+    values = np.empty((len(GRID_FIELDS), altitudes_km.size, lats.size, lons.size))
+    for k, alt in enumerate(altitudes_km):
+        values[:, k] = _grid_values(lat_grid, lon_grid, alt, model)
+    values.setflags(write=False)
+    altitudes_km.setflags(write=False)
+    return LookupGrid(values, float(resolution_deg), altitudes_km, tuple(model.coefficients), float(model.r0))
+
+def _write_atomic(path, write):
+    """Calls write(binary_file) on a temporary file next to path, then renames it into place."""
+    temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(temporary, "xb") as f:
+            write(f)
+        os.replace(temporary, path)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+def save_lookup_grid(grid, path):
+    """
+    Writes the grid as <path>.npy (values) plus <path>.json (axes and model).
+
+    The .npy file can be memory-mapped by load_lookup_grid, so several worker
+    processes share one copy through the page cache. Both files are written
+    to temporary names and renamed into place, the .json last, so a present
+    .json always marks a complete grid, even with concurrent writers.
+    """
+    stem = os.path.splitext(path)[0]
+    meta = {
+        "fields": list(GRID_FIELDS),
+        "resolution_deg": grid.resolution_deg,
+        "altitudes_km": grid.altitudes_km.tolist(),
+        "coefficients": list(grid.coefficients),
+        "r0": grid.r0,
+    }
+    _write_atomic(stem + ".npy", lambda f: np.save(f, np.asarray(grid.values)))
+    _write_atomic(stem + ".json", lambda f: f.write(json.dumps(meta).encode()))
+
+def load_lookup_grid(path, mmap=True):
+    """Loads a grid written by save_lookup_grid, memory-mapped read-only by default."""
+    stem = os.path.splitext(path)[0]
+    with open(stem + ".json") as f:
+        meta = json.load(f)
+    if tuple(meta["fields"]) != GRID_FIELDS:
+        raise ValueError(f"{stem}.npy was written with different grid fields: {meta['fields']}")
+    values = np.load(stem + ".npy", mmap_mode='r' if mmap else None)
+    return LookupGrid(
+        values, float(meta["resolution_deg"]), np.asarray(meta["altitudes_km"], dtype=float),
+        tuple(meta["coefficients"]), float(meta["r0"])
+    )
+
+@functools.lru_cache(maxsize=8)
+def _cached_lookup_grid(model, resolution_deg, altitudes_km, cache_dir):
+    if cache_dir is None:
+        return build_lookup_grid(model, resolution_deg, altitudes_km)
+    key = repr((tuple(model.coefficients), model.r0, resolution_deg, altitudes_km, GRID_FIELDS))
+    path = os.path.join(cache_dir, "geomag_grid_" + hashlib.sha1(key.encode()).hexdigest()[:16] + ".npy")
+    # The .json sidecar is written last, so it marks a complete grid
+    if not os.path.exists(os.path.splitext(path)[0] + ".json"):
+        os.makedirs(cache_dir, exist_ok=True)
+        save_lookup_grid(build_lookup_grid(model, resolution_deg, altitudes_km), path)
+    return load_lookup_grid(path)
+
+def get_lookup_grid(model=None, resolution_deg=DEFAULT_RESOLUTION_DEG, altitudes_km=(0.0,), cache_dir=None):
+    """
+    Returns the grid for a model, building it at most once per process.
+
+    With cache_dir, the grid is also persisted there on first use and later
+    memory-mapped from disk, so other processes skip the computation.
+    """
+    if model is None:
+        model = parameters.get_dipole_model()
+    altitudes_km = tuple(sorted(float(a) for a in np.ravel(altitudes_km)))
+    return _cached_lookup_grid(model, float(resolution_deg), altitudes_km, cache_dir)
+
+FIELD_OUTPUTS = ("Br (nT)", "B_theta (nT)", "B_lambda (nT)", "Dip Angle (°)", "Declination Angle (°)")
+CD_OUTPUTS = ("CD Latitude (°)", "CD Longitude (°)")
+ED_OUTPUTS = ("ED Latitude (°)", "ED Longitude (°)")
+ALL_OUTPUTS = FIELD_OUTPUTS + CD_OUTPUTS + ED_OUTPUTS
+
+def interpolate_lookup_grid(grid, lat_deg, lon_deg, *, alt_km=0.0, outputs=ALL_OUTPUTS):
+    """
+    Interpolates a LookupGrid at broadcastable lat/lon/altitude arrays.
+
+    Returns a dict with the requested outputs, a subset of ALL_OUTPUTS: the
+    keys of field.calculate_geomagnetic_field plus CD/ED latitude and
+    longitude. Only the grid fields needed for those outputs are gathered, so
+    asking for fewer outputs is proportionally faster. Altitudes must lie
+    within the grid's altitude levels.
+    """
+    unknown = set(outputs) - set(ALL_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Unknown lookup grid outputs: {sorted(unknown)}")
+    lat_deg, lon_deg, alt_km = np.broadcast_arrays(
+        np.asarray(lat_deg, dtype=float), np.asarray(lon_deg, dtype=float), np.asarray(alt_km, dtype=float)
+    )
+    res = grid.resolution_deg
+    n_alt, n_lat, n_lon = grid.values.shape[1:]
+
+    # Bilinear weights in latitude / longitude, as flat node indices per altitude level
+    fi = (lat_deg + 90.0) / res
+    i = np.clip(np.floor(fi).astype(np.intp), 0, n_lat - 2)
+    a = fi - i
+    fj = np.mod(lon_deg + 180.0, 360.0) / res
+    j = np.clip(np.floor(fj).astype(np.intp), 0, n_lon - 2)
+    b = fj - j
+    corners = (0, n_lon, 1, n_lon + 1)
+    weights = ((1 - a) * (1 - b), a * (1 - b), (1 - a) * b, a * b)
+
+    # Linear weights in altitude
+    levels = grid.altitudes_km
+    if np.any(alt_km < levels[0] - 1e-9) or np.any(alt_km > levels[-1] + 1e-9):
+        raise ValueError(f"Altitudes must lie between {levels[0]} and {levels[-1]} km for this grid.")
+    if n_alt == 1:
+        base = i * n_lon + j
+        level_terms = ((base, None),)
+    else:
+        k = np.clip(np.searchsorted(levels, alt_km, side='right') - 1, 0, n_alt - 2)
+        c = (alt_km - levels[k]) / (levels[k + 1] - levels[k])
+        base = (k * n_lat + i) * n_lon + j
+        level_terms = ((base, 1 - c), (base + n_lat * n_lon, c))
+
+    def interpolate(field_index):
+        flat = grid.values[field_index].reshape(-1)
+        total = 0.0
+        for level_base, level_weight in level_terms:
+            value = sum(flat[level_base + offset] * w for offset, w in zip(corners, weights))
+            total = total + (value if level_weight is None else value * level_weight)
+        return total
+
+    result = {}
+    if set(outputs) & set(FIELD_OUTPUTS):
+        scale = (grid.r0 / (grid.r0 + alt_km))**3
+        B_r, B_theta, B_lambda = (interpolate(f) * scale for f in range(3))
+        horizontal_field = np.sqrt(B_theta**2 + B_lambda**2)
+        result.update({
+            "Br (nT)": B_r,
+            "B_theta (nT)": B_theta,
+            "B_lambda (nT)": B_lambda,
+            "Dip Angle (°)": np.degrees(np.arctan2(-B_r, horizontal_field)),
+            "Declination Angle (°)": np.degrees(np.arctan2(B_lambda, B_theta)),
+        })
+    for keys, first in ((CD_OUTPUTS, 3), (ED_OUTPUTS, 6)):
+        if set(outputs) & set(keys):
+            vectors = np.stack([interpolate(f) for f in range(first, first + 3)], axis=-1)
+            result[keys[0]], result[keys[1]], _ = coordinates.cartesian_to_latlon(vectors)
+    return {key: result[key] for key in outputs}
+
+def estimate_max_error(grid, n_points=200000, seed=0):
+    """
+    Compares interpolate_lookup_grid with the analytic path at random points.
+
+    Returns the maximum absolute error per output key. Declination is only
+    compared for |lat| <= 88 deg and horizontal field >= 2000 nT, and magnetic
+    longitudes for |magnetic lat| <= 89 deg, where they are well conditioned.
+    """
+    rng = np.random.default_rng(seed)
+    lat = rng.uniform(-90.0, 90.0, n_points)
+    lon = rng.uniform(-180.0, 180.0, n_points)
+    alt = rng.uniform(grid.altitudes_km[0], grid.altitudes_km[-1], n_points)
+    model = grid.model
+
+    approx = interpolate_lookup_grid(grid, lat, lon, alt_km=alt)
+    exact = field.calculate_geomagnetic_field_batch(lat, lon, alt_km=alt, model=model)
+    exact["CD Latitude (°)"], exact["CD Longitude (°)"] = coordinates.geographic_to_cd_latlon(lat, lon, model=model)
+    exact["ED Latitude (°)"], exact["ED Longitude (°)"], _ = coordinates.geographic_to_ed_latlon(lat, lon, alt_km=alt, model=model)
+
+    horizontal_field = np.hypot(exact["B_theta (nT)"], exact["B_lambda (nT)"])
+    masks = {
+        "Declination Angle (°)": (np.abs(lat) <= 88.0) & (horizontal_field >= 2000.0),
+        "CD Longitude (°)": np.abs(exact["CD Latitude (°)"]) <= 89.0,
+        "ED Longitude (°)": np.abs(exact["ED Latitude (°)"]) <= 89.0,
+    }
+    errors = {}
+    for key in ALL_OUTPUTS:
+        value = exact[key]
+        diff = np.abs(approx[key] - value)
+        if "Longitude" in key or "Declination" in key:
+            diff = np.abs(np.mod(approx[key] - value + 180.0, 360.0) - 180.0)
+        errors[key] = float(diff[masks.get(key, slice(None))].max())
+    return errors
@@ -0,0 +1,273 @@
+# geomag_transformations/igrf.py
+
+#This module evaluates the IGRF main field as a full spherical-harmonic
+#expansion of arbitrary degree, as a reference alongside the centered and
+#eccentric dipole approximations of field.py.
+#
+#The Schmidt semi-normalized associated Legendre functions and their theta
+#derivatives are built with vectorized recurrences over point arrays:
+#    P_0^0 = 1,  P_1^1 = sin(theta)
+#    P_m^m = sqrt((2m - 1) / 2m) sin(theta) P_{m-1}^{m-1}                      (m >= 2)
+#    P_n^m = [(2n - 1) cos(theta) P_{n-1}^m - sqrt((n - 1)^2 - m^2) P_{n-2}^m] / sqrt(n^2 - m^2)
+#with the derivatives from the differentiated recurrences. B_phi needs
+#P_n^m / sin(theta), which is built directly as S_n^m (m >= 1) with no
+#division, so it keeps its finite limit at the geographic poles:
+#    S_1^1 = 1,  S_m^m = sqrt((2m - 1) / 2m) P_{m-1}^{m-1}                     (m >= 2)
+#    S_n^m = [(2n - 1) cos(theta) S_{n-1}^m - sqrt((n - 1)^2 - m^2) S_{n-2}^m] / sqrt(n^2 - m^2)
+#Points are
+#evaluated in chunks; where many points of a chunk share a colatitude (a
+#regular grid) the tables are built once per distinct value and kept in a
+#small LRU cache bounded by LEGENDRE_CACHE_BYTES, so repeated grids reuse them.
+#
+#The full degree-13 IGRF-14 model (1900-2030) ships as package data in the
+#IAGA SHC format (data/IGRF14.shc) and is the default; other official files
+#(igrfNNcoeffs.txt or .shc) are read with load_igrf_coefficients.
+
+import collections
+import functools
+import os
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+from . import coordinates, field, instrumentation, parameters
+
+IGRF_SHC_PATH = os.path.join(os.path.dirname(__file__), "data", "IGRF14.shc")
+# Points are evaluated in chunks of this size to bound the table memory
+SH_CHUNK_SIZE = 16384
+# Total size of the cached per-colatitude tables (P and dP) in bytes
+LEGENDRE_CACHE_BYTES = 64 * 2**20
+
+@dataclass(frozen=True)
+class IGRFCoefficients:
+    """
+    Gauss coefficients of a spherical-harmonic main-field model.
+
+    g and h have shape (n_epochs, nmax + 1, nmax + 1), indexed [epoch, n, m]
+    (nT). g_sv/h_sv (nT/yr) extrapolate after the last epoch up to
+    valid_until. r0 is the reference radius in km.
+    """
+    epochs: np.ndarray
+    g: np.ndarray
+    h: np.ndarray
+    g_sv: np.ndarray
+    h_sv: np.ndarray
+    valid_until: float
+    r0: float = parameters.R0
+
+    @property
+    def nmax(self):
+        return self.g.shape[-1] - 1
+
+    def at(self, date):
+        """Returns the (g, h) arrays, shape (nmax + 1, nmax + 1), for one date or decimal year."""
+        if isinstance(date, (int, float, np.integer, np.floating)):
+            year = float(date)
+        else:
+            year = float(parameters.decimal_year(date))
+        if not self.epochs[0] <= year <= self.valid_until:
+            raise ValueError(f"Date {year:.3f} is outside the model range {self.epochs[0]:.0f}-{self.valid_until:.0f}.")
+        if year >= self.epochs[-1]:
+            dt = year - self.epochs[-1]
+            return self.g[-1] + dt * self.g_sv, self.h[-1] + dt * self.h_sv
+        i = min(np.searchsorted(self.epochs, year, side="right") - 1, len(self.epochs) - 2)
+        w = (year - self.epochs[i]) / (self.epochs[i + 1] - self.epochs[i])
+        return (1 - w) * self.g[i] + w * self.g[i + 1], (1 - w) * self.h[i] + w * self.h[i + 1]
+
+@functools.lru_cache(maxsize=1)
+def default_igrf_coefficients():
+    """The bundled IGRF-14 model (degree 13, 1900-2030)."""
+    return load_igrf_coefficients(IGRF_SHC_PATH)
+
+def _read_coeffs_txt(lines):
+    """Parses the igrfNNcoeffs.txt layout: "g/h n m <epochs> YYYY-YY" header, then "g|h n m values..."."""
+    epochs, records = None, []
+    for parts in lines:
+        if parts[0] == "g/h":
+            epochs = np.array([float(p) for p in parts[3:-1]])
+        elif parts[0] in ("g", "h"):
+            records.append((parts[0], int(parts[1]), int(parts[2]), [float(p) for p in parts[3:]]))
+    if epochs is None or not records:
+        return None
+
+    nmax = max(n for _, n, _, _ in records)
+    g = np.zeros((len(epochs), nmax + 1, nmax + 1))
+    h = np.zeros_like(g)
+    g_sv = np.zeros((nmax + 1, nmax + 1))
+    h_sv = np.zeros_like(g_sv)
+    for kind, n, m, values in records:
+        target, target_sv = (g, g_sv) if kind == "g" else (h, h_sv)
+        target[:, n, m] = values[:len(epochs)]
+        target_sv[n, m] = values[len(epochs)]
+    return IGRFCoefficients(epochs=epochs, g=g, h=h, g_sv=g_sv, h_sv=h_sv, valid_until=float(epochs[-1] + 5.0))
+
+def _read_shc(lines):
+    """
+    Parses the IAGA SHC layout: a "nmin nmax ntimes order steps" header, a
+    line of epochs, then "n m values..." with m < 0 holding h_n^|m|. The
+    last epoch is the end of validity (a forecast from the secular
+    variation), so no further extrapolation is applied.
+    """
+    header, epochs, g, h = None, None, None, None
+    for parts in lines:
+        if header is None:
+            header = [int(float(p)) for p in parts[:3]]
+            continue
+        if epochs is None:
+            epochs = np.array([float(p) for p in parts])
+            if len(epochs) != header[2]:
+                return None
+            g = np.zeros((len(epochs), header[1] + 1, header[1] + 1))
+            h = np.zeros_like(g)
+            continue
+        n, m = int(parts[0]), int(parts[1])
+        (g if m >= 0 else h)[:, n, abs(m)] = [float(p) for p in parts[2:2 + len(epochs)]]
+    if g is None:
+        return None
+    zeros = np.zeros(g.shape[1:])
+    return IGRFCoefficients(epochs=epochs, g=g, h=h, g_sv=zeros, h_sv=zeros, valid_until=float(epochs[-1]))
+
+@functools.lru_cache(maxsize=8)
+def load_igrf_coefficients(path):
+    """
+    Reads an official IGRF coefficient file, either igrfNNcoeffs.txt
+    (e.g. igrf14coeffs.txt) or the IAGA SHC format (e.g. IGRF14.shc).
+
+    Lines starting with '#' are comments.
+    """
+    with open(path) as handle:
+        lines = [line.split() for line in handle]
+    lines = [parts for parts in lines if parts and not parts[0].startswith("#")]
+    coefficients = None
+    if lines:
+        is_txt = any(parts[0] == "g/h" for parts in lines[:5])
+        coefficients = _read_coeffs_txt(lines) if is_txt else _read_shc(lines)
+    if coefficients is None:
+        raise ValueError(f"{path!r} is not an IGRF coefficient file.")
+    return coefficients
+
+def _legendre_tables(theta_rad, nmax):
+    """P, dP/dtheta and S = P / sin(theta) (zero for m = 0), by the recurrences in the module header."""
+    theta_rad = np.asarray(theta_rad, dtype=float)
+    sin_t, cos_t = np.sin(theta_rad), np.cos(theta_rad)
+    P = np.zeros((nmax + 1, nmax + 1) + theta_rad.shape)
+    dP = np.zeros_like(P)
+    S = np.zeros_like(P)
+    P[0, 0] = 1.0
+    for m in range(1, nmax + 1):
+        k = 1.0 if m == 1 else np.sqrt((2 * m - 1) / (2 * m))
+        S[m, m] = k * P[m - 1, m - 1]
+        P[m, m] = sin_t * S[m, m]
+        dP[m, m] = k * (cos_t * P[m - 1, m - 1] + sin_t * dP[m - 1, m - 1])
+    for m in range(nmax + 1):
+        for n in range(m + 1, nmax + 1):
+            a = np.sqrt(n * n - m * m)
+            b = np.sqrt((n - 1) ** 2 - m * m)
+            P[n, m] = ((2 * n - 1) * cos_t * P[n - 1, m] - b * P[n - 2, m]) / a
+            dP[n, m] = ((2 * n - 1) * (cos_t * dP[n - 1, m] - sin_t * P[n - 1, m]) - b * dP[n - 2, m]) / a
+            if m:
+                S[n, m] = ((2 * n - 1) * cos_t * S[n - 1, m] - b * S[n - 2, m]) / a
+    return P, dP, S
+
+def schmidt_legendre(theta_rad, nmax):
+    """
+    Schmidt semi-normalized P_n^m(cos theta) and dP_n^m/dtheta for an array
+    of colatitudes, by the recurrences in the module header.
+
+    Returns two arrays of shape (nmax + 1, nmax + 1) + theta_rad.shape,
+    indexed [n, m]; entries with m > n are zero.
+    """
+    P, dP, _ = _legendre_tables(theta_rad, nmax)
+    return P, dP
+
+_legendre_cache = collections.OrderedDict()
+_legendre_cache_bytes = 0
+_legendre_lock = threading.Lock()
+
+def _cached_legendre(unique_theta, nmax):
+    """
+    Tables for the distinct colatitudes of one chunk, from a byte-bounded LRU.
+    Keys are at most SH_CHUNK_SIZE / 4 floats, so hashing them stays cheap.
+    """
+    global _legendre_cache_bytes
+    key = (nmax, unique_theta.tobytes())
+    with _legendre_lock:
+        tables = _legendre_cache.get(key)
+        if tables is not None:
+            _legendre_cache.move_to_end(key)
+            return tables
+    tables = _legendre_tables(unique_theta, nmax)
+    for table in tables:
+        table.flags.writeable = False
+    size = sum(table.nbytes for table in tables)
+    if size <= LEGENDRE_CACHE_BYTES:
+        with _legendre_lock:
+            if key not in _legendre_cache:
+                _legendre_cache[key] = tables
+                _legendre_cache_bytes += size
+            while _legendre_cache_bytes > LEGENDRE_CACHE_BYTES:
+                _, old = _legendre_cache.popitem(last=False)
+                _legendre_cache_bytes -= sum(table.nbytes for table in old)
+    return tables
+
+def _sum_harmonics(P, dP, S, index, g, h, nmax, lon_rad, ratio):
+    """Sums the expansion for B_r, B_theta and B_phi; index gathers table columns per point."""
+    take = (lambda a: a) if index is None else (lambda a: a[index])
+    B_r = np.zeros(lon_rad.shape)
+    B_theta = np.zeros(lon_rad.shape)
+    B_phi = np.zeros(lon_rad.shape)
+    cos_m = [np.cos(m * lon_rad) for m in range(nmax + 1)]
+    sin_m = [np.sin(m * lon_rad) for m in range(nmax + 1)]
+    ratio_n = ratio * ratio  # (r0/r)^(n+2), starting at n = 0
+    for n in range(1, nmax + 1):
+        ratio_n = ratio_n * ratio
+        for m in range(n + 1):
+            P_nm = take(P[n, m])
+            gh = g[n, m] * cos_m[m] + h[n, m] * sin_m[m]
+            B_r += (n + 1) * ratio_n * gh * P_nm
+            B_theta -= ratio_n * gh * take(dP[n, m])
+            if m:
+                B_phi += m * ratio_n * (g[n, m] * sin_m[m] - h[n, m] * cos_m[m]) * take(S[n, m])
+    return B_r, B_theta, B_phi
+
+@instrumentation.stage("igrf.calculate_igrf_field_batch")
+def calculate_igrf_field_batch(lat_deg, lon_deg, *, alt_km=0.0, date=1990.0, coefficients=None, nmax=None, geodetic=False):
+    """
+    Full spherical-harmonic IGRF field at arrays of points.
+
+    Returns the keys of field.calculate_geomagnetic_field_batch (Br,
+    B_theta, B_lambda, north/east/down, dip and declination) for the model
+    at date (a datetime, ISO string, datetime64 or decimal year).
+    coefficients is an IGRFCoefficients table (the bundled degree-13
+    IGRF-14 model when omitted) and nmax optionally truncates the expansion. alt_km and
+    geodetic are as in the dipole batch APIs.
+    """
+    if coefficients is None:
+        coefficients = default_igrf_coefficients()
+    nmax = coefficients.nmax if nmax is None else min(nmax, coefficients.nmax)
+    g, h = coefficients.at(date)
+    r0 = coefficients.r0
+
+    lat_deg, r, psi_rad = coordinates.geocentric_inputs(lat_deg, alt_km, r0, geodetic)
+    lat_deg, lon_deg, r, psi_rad = np.broadcast_arrays(lat_deg, np.asarray(lon_deg, dtype=float), r, psi_rad)
+    shape = lat_deg.shape
+    theta_rad = np.radians(90.0 - lat_deg).ravel()
+    lon_rad = np.radians(lon_deg).ravel()
+    ratio = (r0 / r).ravel()
+
+    B_r, B_theta, B_phi = (np.empty(theta_rad.size) for _ in range(3))
+    for start in range(0, theta_rad.size, SH_CHUNK_SIZE):
+        part = slice(start, start + SH_CHUNK_SIZE)
+        theta_part = theta_rad[part]
+        unique, inverse = np.unique(theta_part, return_inverse=True)
+        if unique.size * 4 <= theta_part.size:
+            # Many points share a colatitude (e.g. a grid): one cached table per distinct value
+            tables = _cached_legendre(unique, nmax)
+            index = inverse
+        else:
+            tables = _legendre_tables(theta_part, nmax)
+            index = None
+        B_r[part], B_theta[part], B_phi[part] = _sum_harmonics(*tables, index, g, h, nmax, lon_rad[part], ratio[part])
+
+    return field.local_field_outputs(B_r.reshape(shape), B_theta.reshape(shape), B_phi.reshape(shape), psi_rad)
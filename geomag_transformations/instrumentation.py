@@ -0,0 +1,185 @@
+# geomag_transformations/instrumentation.py
+
+#This module provides opt-in, per-stage instrumentation of the transforms.
+#
+#Functions decorated with @stage(name), and blocks wrapped in
+#`with timed(name):`, record call counts, cumulative time, a bounded sample
+#of latencies for percentiles, and batch sizes, but only while
+#instrumentation is enabled. When it is disabled, a decorated call costs one
+#global flag check and timed() returns a shared no-op context. Hooks
+#(callables taking (stage, seconds, batch_size)) receive every recorded call,
+#so the stats can be forwarded to an external metrics system. A failing hook
+#is logged and skipped; it never changes the result or exception of the
+#instrumented call.
+
+import collections
+import contextlib
+import functools
+import logging
+import threading
+import time
+
+import numpy as np
+
+# Latency samples kept per stage for the percentiles in snapshot()
+SAMPLES_PER_STAGE = 2048
+
+_enabled = False
+_lock = threading.Lock()
+_stats = {}
+_hooks = []
+_log = logging.getLogger(__name__)
+
+class _StageStats:
+    __slots__ = ("count", "total_s", "max_s", "items", "max_batch", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_s = 0.0
+        self.max_s = 0.0
+        self.items = 0
+        self.max_batch = 0
+        self.samples = collections.deque(maxlen=SAMPLES_PER_STAGE)
+
+def enable():
+    """Turns instrumentation on for the whole process."""
+    global _enabled
+    _enabled = True
+
+def disable():
+    """Turns instrumentation off; recorded stats are kept until reset()."""
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Clears all recorded stats."""
+    with _lock:
+        _stats.clear()
+
+def add_hook(hook):
+    """Registers hook(stage, seconds, batch_size), called after every recorded call; its exceptions are logged."""
+    with _lock:
+        _hooks.append(hook)
+
+def remove_hook(hook):
+    with _lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+def record(name, seconds, batch_size=1):
+    """Records one call of a stage and forwards it to the hooks."""
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = _StageStats()
+        stats.count += 1
+        stats.total_s += seconds
+        stats.max_s = max(stats.max_s, seconds)
+        stats.items += batch_size
+        stats.max_batch = max(stats.max_batch, batch_size)
+        stats.samples.append(seconds)
+        hooks = tuple(_hooks)
+    for hook in hooks:
+        try:
+            hook(name, seconds, batch_size)
+        except Exception:
+            _log.exception("Instrumentation hook %r failed for stage %r", hook, name)
+
+def snapshot():
+    """
+    Returns {stage: stats} with count, total_s, mean_s, p50_s, p90_s, p99_s
+    (over the last SAMPLES_PER_STAGE calls), max_s, items (points
+    processed), mean_batch and max_batch.
+    """
+    with _lock:
+        copied = {
+            name: (s.count, s.total_s, s.max_s, s.items, s.max_batch, np.array(s.samples))
+            for name, s in _stats.items()
+        }
+    result = {}
+    for name, (count, total_s, max_s, items, max_batch, samples) in sorted(copied.items()):
+        p50, p90, p99 = np.percentile(samples, [50, 90, 99]) if samples.size else (0.0, 0.0, 0.0)
+        result[name] = {
+            "count": count,
+            "total_s": total_s,
+            "mean_s": total_s / count if count else 0.0,
+            "p50_s": float(p50),
+            "p90_s": float(p90),
+            "p99_s": float(p99),
+            "max_s": max_s,
+            "items": items,
+            "mean_batch": items / count if count else 0.0,
+            "max_batch": max_batch,
+        }
+    return result
+
+def _batch_size(args, batch_arg):
+    if batch_arg is None or len(args) <= batch_arg:
+        return 1
+    return int(np.size(args[batch_arg]))
+
+def stage(name, batch_arg=0):
+    """
+    Decorator recording each call of the function as stage `name` while
+    instrumentation is enabled. The batch size is the number of elements of
+    positional argument batch_arg (None for 1 per call).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start, _batch_size(args, batch_arg))
+        return wrapper
+    return decorator
+
+class _Timed:
+    __slots__ = ("name", "batch_size", "start")
+
+    def __init__(self, name, batch_size):
+        self.name = name
+        self.batch_size = batch_size
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start, self.batch_size)
+        return False
+
+_NO_OP = contextlib.nullcontext()
+
+def timed(name, batch_size=1):
+    """Context manager recording the enclosed block as stage `name` (a no-op while disabled)."""
+    if not _enabled:
+        return _NO_OP
+    return _Timed(name, batch_size)
+
+@contextlib.contextmanager
+def instrumented(hook=None, reset_stats=False):
+    """
+    Enables instrumentation for the enclosed block, optionally with a hook
+    and starting from cleared stats, and restores the previous state after.
+    Yields the snapshot function.
+    """
+    global _enabled
+    previous = _enabled
+    if reset_stats:
+        reset()
+    if hook is not None:
+        add_hook(hook)
+    _enabled = True
+    try:
+        yield snapshot
+    finally:
+        _enabled = previous
+        if hook is not None:
+            remove_hook(hook)
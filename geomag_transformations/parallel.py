@@ -0,0 +1,199 @@
+# geomag_transformations/parallel.py
+
+#This module runs the batch transforms over very large arrays in parallel.
+#
+#Inputs (and NumPy array keyword arguments such as dates) are broadcast,
+#flattened and split into fixed-size chunks. Each chunk is evaluated by a
+#thread pool (NumPy releases the GIL inside its kernels) or a process pool
+#whose workers read inputs from, and write outputs to, shared memory blocks,
+#so array data is never pickled. Inputs are copied into shared memory once;
+#outputs are allocated there and returned as views rather than copied out.
+#Chunk boundaries depend only on chunk_size, so the result is identical for
+#any number of workers and either backend.
+
+import concurrent.futures
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_CHUNK_SIZE = 65536
+
+def _chunk_bounds(size, chunk_size):
+    return [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+
+def _as_output_dict(result):
+    """Normalizes a batch function result to (kind, dict of arrays)."""
+    if isinstance(result, dict):
+        return "dict", result
+    if isinstance(result, tuple):
+        return "tuple", {i: value for i, value in enumerate(result)}
+    return "array", {0: result}
+
+def _from_output_dict(kind, outputs):
+    if kind == "dict":
+        return outputs
+    if kind == "tuple":
+        return tuple(outputs[i] for i in range(len(outputs)))
+    return outputs[0]
+
+def _prepare_inputs(arrays):
+    """Broadcasts the inputs against each other; returns the shape and the broadcast views."""
+    arrays = [np.asarray(a) for a in arrays]
+    broadcast = np.broadcast_arrays(*arrays)
+    shape = broadcast[0].shape if broadcast else ()
+    return shape, broadcast
+
+def _split_kwargs(func_kwargs):
+    """Separates NumPy array kwargs, chunked like the inputs, from those passed to every chunk as-is."""
+    arrays = {k: v for k, v in func_kwargs.items() if isinstance(v, np.ndarray) and v.ndim}
+    static = {k: v for k, v in func_kwargs.items() if k not in arrays}
+    return arrays, static
+
+def _call_chunk(func, inputs, names, static_kwargs, lo, hi):
+    """Calls func on inputs[lo:hi]; the last len(names) inputs are passed as those keywords."""
+    chunk = [a[lo:hi] for a in inputs]
+    n_positional = len(chunk) - len(names)
+    return _as_output_dict(func(*chunk[:n_positional], **dict(zip(names, chunk[n_positional:])), **static_kwargs))
+
+def run_chunked(func, arrays, func_kwargs=None, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, backend="thread"):
+    """
+    Evaluates func(*chunk_arrays, **func_kwargs) chunk by chunk, in parallel.
+
+    arrays is a sequence of broadcastable input arrays (e.g. lat, lon, alt)
+    and func a vectorized batch function such as
+    field.calculate_geomagnetic_field_batch, returning a dict of arrays, a
+    tuple of arrays or one array. func_kwargs values that are NumPy arrays
+    (e.g. dates) are broadcast with arrays and chunked like them; all other
+    values are passed to every chunk unchanged. Outputs are preallocated for
+    the full broadcast shape and every chunk writes its slice in place.
+    backend is "thread" or "process"; the process backend needs a picklable,
+    module-level func and inputs with a fixed-size dtype (e.g. float64 or
+    datetime64[ns]), and returns arrays that live in shared memory. workers
+    defaults to os.cpu_count(). The result is the same as calling func on
+    each chunk in turn and does not depend on workers or backend.
+    """
+    if backend not in ("thread", "process"):
+        raise ValueError(f"Unknown parallel backend: {backend!r}")
+    workers = workers or os.cpu_count() or 1
+    array_kwargs, static_kwargs = _split_kwargs(func_kwargs or {})
+    names = tuple(array_kwargs)
+    shape, broadcast = _prepare_inputs(list(arrays) + list(array_kwargs.values()))
+    size = int(np.prod(shape, dtype=np.int64))
+    bounds = _chunk_bounds(size, chunk_size)
+    if backend == "process" and workers > 1 and len(bounds) > 1:
+        return _run_in_processes(func, static_kwargs, names, broadcast, shape, bounds, workers)
+
+    flat_inputs = [np.ascontiguousarray(b).reshape(-1) for b in broadcast]
+    if not bounds:
+        return _from_output_dict(*_call_chunk(func, flat_inputs, names, static_kwargs, 0, 0))
+
+    # The first chunk runs in the caller to discover the output keys and dtypes
+    start, stop = bounds[0]
+    kind, first = _call_chunk(func, flat_inputs, names, static_kwargs, start, stop)
+    outputs = {key: np.empty(size, dtype=np.asarray(value).dtype) for key, value in first.items()}
+    for key, value in first.items():
+        outputs[key][start:stop] = value
+
+    def run(bound):
+        lo, hi = bound
+        _, result = _call_chunk(func, flat_inputs, names, static_kwargs, lo, hi)
+        for key, value in result.items():
+            outputs[key][lo:hi] = value
+
+    remaining = bounds[1:]
+    if remaining and backend == "thread" and workers > 1:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(run, bound) for bound in remaining]:
+                future.result()
+    else:
+        for bound in remaining:
+            run(bound)
+
+    return _from_output_dict(kind, {key: value.reshape(shape) for key, value in outputs.items()})
+
+class _SharedArrayOwner:
+    """
+    Exposes a shared-memory block to NumPy through __array_interface__.
+
+    Arrays built from it hold the owner as their base, so the block stays
+    mapped while any of them (or a view of them) is alive, and is closed
+    when the last one goes.
+    """
+
+    def __init__(self, block, size, dtype):
+        self.block = block
+        address = np.ndarray((1,), dtype=np.uint8, buffer=block.buf).__array_interface__["data"][0]
+        self.__array_interface__ = {"shape": (size,), "typestr": dtype.str, "data": (address, False), "version": 3}
+
+def _create_shared(size, dtype):
+    dtype = np.dtype(dtype)
+    if dtype.hasobject:
+        raise TypeError("The process backend needs arrays with a fixed-size dtype, not object arrays.")
+    block = shared_memory.SharedMemory(create=True, size=max(size * dtype.itemsize, 1))
+    return block, (block.name, size, dtype.str)
+
+def _run_in_processes(func, static_kwargs, names, broadcast, shape, bounds, workers):
+    """
+    Process-pool path of run_chunked. Inputs are copied once into shared
+    memory and outputs are allocated there and returned as views, so neither
+    is held twice.
+    """
+    size = int(np.prod(shape, dtype=np.int64))
+    input_blocks, output_blocks = [], []
+    try:
+        inputs, input_specs = [], []
+        for array in broadcast:
+            block, spec = _create_shared(size, array.dtype)
+            input_blocks.append(block)
+            view = np.ndarray((size,), dtype=array.dtype, buffer=block.buf)
+            view.reshape(shape)[...] = array
+            inputs.append(view)
+            input_specs.append(spec)
+
+        # The first chunk runs in the caller to discover the output keys and dtypes
+        start, stop = bounds[0]
+        kind, first = _call_chunk(func, inputs, names, static_kwargs, start, stop)
+        outputs, output_specs = {}, {}
+        for key, value in first.items():
+            dtype = np.asarray(value).dtype
+            block, output_specs[key] = _create_shared(size, dtype)
+            output_blocks.append(block)
+            outputs[key] = np.asarray(_SharedArrayOwner(block, size, dtype))
+            outputs[key][start:stop] = value
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_process_chunk, func, static_kwargs, names, input_specs, output_specs, lo, hi)
+                for lo, hi in bounds[1:]
+            ]
+            for future in futures:
+                future.result()
+    finally:
+        for block in input_blocks:
+            block.close()
+            block.unlink()
+        # Output blocks stay mapped for the returned arrays; only their names are released
+        for block in output_blocks:
+            block.unlink()
+
+    return _from_output_dict(kind, {key: value.reshape(shape) for key, value in outputs.items()})
+
+def _process_chunk(func, static_kwargs, names, input_specs, output_specs, lo, hi):
+    """Worker side of _run_in_processes: evaluates one chunk in shared memory."""
+    blocks = []
+    try:
+        def attach(spec):
+            name, size, dtype = spec
+            block = shared_memory.SharedMemory(name=name)
+            blocks.append(block)
+            return np.ndarray((size,), dtype=np.dtype(dtype), buffer=block.buf)
+
+        inputs = [attach(spec) for spec in input_specs]
+        _, result = _call_chunk(func, inputs, names, static_kwargs, lo, hi)
+        for key, spec in output_specs.items():
+            attach(spec)[lo:hi] = result[key]
+        del inputs
+    finally:
+        for block in blocks:
+            block.close()
@@ -4,8 +4,16 @@
 
 
 # geomag_transformations/parameters.py
+import collections
+import datetime
+import functools
+import threading
+from dataclasses import dataclass
+
 import numpy as np
 
+from . import instrumentation
+
 # --- IGRF-1990 Model Constants ---
 G1_0 = -29775.0
 G1_1 = -1851.0
@@ -17,6 +25,50 @@ G2_2 = 1693.0
 H2_2 = -380.0
 R0 = 6371.2  # Earth's mean radius in km
 
+# Degree-1/2 coefficients in the order expected by get_dipole_model
+IGRF_1990 = (G1_0, G1_1, H1_1, G2_0, G2_1, H2_1, G2_2, H2_2)
+
+# --- IGRF-14 degree-1/2 coefficients, DGRF/IGRF 1900-2025 (nT) ---
+# IGRF_EPOCHS, IGRF_COEFFICIENTS (columns follow IGRF_1990: g1_0, g1_1, h1_1,
+# g2_0, g2_1, h2_1, g2_2, h2_2), IGRF_SECULAR_VARIATION (nT/yr, applied after
+# the last epoch) and IGRF_VALID_UNTIL are taken from the bundled IGRF-14
+# model (igrf.default_igrf_coefficients) on first access, so data/IGRF14.shc
+# is their only source and importing this module does not read the file.
+_IGRF_TABLE_NAMES = ("IGRF_EPOCHS", "IGRF_COEFFICIENTS", "IGRF_SECULAR_VARIATION", "IGRF_VALID_UNTIL")
+
+# Time-interpolated models are cached per bucket of 1/EPOCH_BUCKETS_PER_YEAR years
+EPOCH_BUCKETS_PER_YEAR = 365
+EPOCH_CACHE_SIZE = 256
+
+@functools.lru_cache(maxsize=1)
+def _igrf_table():
+    """
+    Degree-1/2 table of the bundled IGRF-14 model. The last SHC epoch is the
+    secular-variation forecast that ends the model's validity, so it becomes
+    IGRF_SECULAR_VARIATION and IGRF_VALID_UNTIL rather than an epoch.
+    """
+    from . import igrf
+
+    model = igrf.default_igrf_coefficients()
+    g, h = model.g, model.h
+    table = np.stack([g[:, 1, 0], g[:, 1, 1], h[:, 1, 1], g[:, 2, 0], g[:, 2, 1], h[:, 2, 1], g[:, 2, 2], h[:, 2, 2]], axis=-1)
+    epochs = np.array(model.epochs[:-1], dtype=float)
+    coefficients = np.array(table[:-1])
+    secular_variation = (table[-1] - table[-2]) / (model.epochs[-1] - model.epochs[-2])
+    for value in (epochs, coefficients, secular_variation):
+        value.setflags(write=False)
+    return {
+        "IGRF_EPOCHS": epochs,
+        "IGRF_COEFFICIENTS": coefficients,
+        "IGRF_SECULAR_VARIATION": secular_variation,
+        "IGRF_VALID_UNTIL": float(model.epochs[-1]),
+    }
+
+def __getattr__(name):
+    if name in _IGRF_TABLE_NAMES:
+        return _igrf_table()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 def calculate_cd_parameters(g1_0, g1_1, h1_1):
     """Calculates Centered Dipole (CD) parameters from Gauss coefficients."""
     B0 = np.sqrt(g1_0**2 + g1_1**2 + h1_1**2)
@@ -33,6 +85,17 @@ def calculate_rotation_matrix(theta_n_prime_rad, lambda_n_prime_rad):
     l3, m3, n3 = sin_theta * cos_lambda, sin_theta * sin_lambda, cos_theta
     return np.array([[l1, m1, n1], [l2, m2, n2], [l3, m3, n3]])
 
+def calculate_rotation_matrices(theta_n_prime_rad, lambda_n_prime_rad):
+    """Array form of calculate_rotation_matrix, returning shape (..., 3, 3)."""
+    cos_theta, sin_theta = np.cos(theta_n_prime_rad), np.sin(theta_n_prime_rad)
+    cos_lambda, sin_lambda = np.cos(lambda_n_prime_rad), np.sin(lambda_n_prime_rad)
+    rows = [
+        [cos_theta * cos_lambda, cos_theta * sin_lambda, -sin_theta],
+        [-sin_lambda, cos_lambda, np.zeros_like(cos_theta)],
+        [sin_theta * cos_lambda, sin_theta * sin_lambda, cos_theta],
+    ]
+    return np.stack([np.stack(row, axis=-1) for row in rows], axis=-2)
+
 def calculate_ed_parameters(g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2, B0):
     """Calculates Eccentric Dipole (ED) position parameters."""
     L1 = -g1_1 * g2_0 + np.sqrt(3) * (g1_0 * g2_1 + g1_1 * g2_2 + h1_1 * h2_2)
@@ -42,4 +105,242 @@ def calculate_ed_parameters(g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2, B0):
     eta = (L1 - g1_1 * E) / (3 * B0**2)
     zeta = (L2 - h1_1 * E) / (3 * B0**2)
     xi = (L0 - g1_0 * E) / (3 * B0**2)
-    return np.array([eta, zeta, xi])
\ No newline at end of file
+    return np.array([eta, zeta, xi])
+
+
+@dataclass(frozen=True, eq=False)
+class DipoleModel:
+    """
+    Immutable CD/ED parameter set derived from one set of Gauss coefficients.
+
+    Build it with get_dipole_model rather than directly, so that equal
+    coefficient sets share one instance. Array attributes are read-only.
+    A model returned by stack_dipole_models carries per-sample leading
+    dimensions on every attribute except r0.
+    """
+    coefficients: tuple
+    r0: float
+    B0: float
+    theta_n_rad: float
+    lambda_n_rad: float
+    rotation_matrix: np.ndarray    # geographic -> CD
+    rotation_matrix_t: np.ndarray  # CD -> geographic
+    ed_params_geo: np.ndarray      # [eta, zeta, xi] in units of r0
+    ed_params_cd: np.ndarray       # ED offset expressed in the CD frame
+    ed_offset_geo: np.ndarray      # r0 * ed_params_geo, in km
+
+def _assemble_dipole_model(coefficients, r0, B0, theta_n_rad, lambda_n_rad, rot_matrix, ed_params_geo):
+    arrays = {
+        "rotation_matrix": np.array(rot_matrix, dtype=float),
+        "rotation_matrix_t": np.ascontiguousarray(np.transpose(rot_matrix), dtype=float),
+        "ed_params_geo": np.array(ed_params_geo, dtype=float),
+        "ed_params_cd": rot_matrix @ ed_params_geo,
+        "ed_offset_geo": r0 * np.asarray(ed_params_geo, dtype=float),
+    }
+    for value in arrays.values():
+        value.setflags(write=False)
+
+    return DipoleModel(
+        coefficients=tuple(float(c) for c in coefficients),
+        r0=r0,
+        B0=float(B0),
+        theta_n_rad=float(theta_n_rad),
+        lambda_n_rad=float(lambda_n_rad),
+        **arrays
+    )
+
+@instrumentation.stage("parameters.build_dipole_model", batch_arg=None)
+def build_dipole_model(coefficients=IGRF_1990, r0=R0):
+    """Computes a DipoleModel from (g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2)."""
+    g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2 = coefficients
+    B0, theta_n_rad, lambda_n_rad = calculate_cd_parameters(g1_0, g1_1, h1_1)
+    rot_matrix = calculate_rotation_matrix(theta_n_rad, lambda_n_rad)
+    ed_params_geo = calculate_ed_parameters(g1_0, g1_1, h1_1, g2_0, g2_1, h2_1, g2_2, h2_2, B0)
+    return _assemble_dipole_model(coefficients, r0, B0, theta_n_rad, lambda_n_rad, rot_matrix, ed_params_geo)
+
+@instrumentation.stage("parameters.build_dipole_models", batch_arg=None)
+def build_dipole_models(coefficient_rows, r0=R0):
+    """
+    Builds one DipoleModel per row of an (N, 8) coefficient array.
+
+    The CD/ED parameters and rotation matrices of all rows are computed in a
+    single vectorized pass; only the final object construction is per row.
+    """
+    c = np.asarray(coefficient_rows, dtype=float).reshape(-1, 8)
+    B0, theta_n_rad, lambda_n_rad = calculate_cd_parameters(c[:, 0], c[:, 1], c[:, 2])
+    rot_matrices = calculate_rotation_matrices(theta_n_rad, lambda_n_rad)
+    ed_params_geo = calculate_ed_parameters(*c.T, B0).T
+    return [
+        _assemble_dipole_model(c[i], r0, B0[i], theta_n_rad[i], lambda_n_rad[i], rot_matrices[i], ed_params_geo[i])
+        for i in range(len(c))
+    ]
+
+@functools.lru_cache(maxsize=64)
+def _cached_dipole_model(coefficients, r0):
+    return build_dipole_model(coefficients, r0)
+
+@instrumentation.stage("parameters.get_dipole_model", batch_arg=None)
+def get_dipole_model(coefficients=IGRF_1990, r0=R0):
+    """
+    Returns the memoized DipoleModel for a coefficient set.
+
+    Repeated calls with the same coefficients return the same instance, so the
+    parameter setup runs once per coefficient set rather than once per call.
+    """
+    key = tuple(float(c) for c in coefficients)
+    return _cached_dipole_model(key, float(r0))
+
+def to_datetime64(dates):
+    """
+    Converts datetimes, ISO strings or datetime64 values (scalar or array) to
+    naive UTC datetime64[ns]. Timezone-aware datetimes are converted to UTC.
+    """
+    arr = np.asarray(dates)
+    if arr.dtype.kind == 'M':
+        return arr.astype('datetime64[ns]')
+    if arr.dtype == object:
+        flat = [
+            d.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+            if isinstance(d, datetime.datetime) and d.tzinfo is not None else d
+            for d in arr.ravel()
+        ]
+        return np.array(flat, dtype='datetime64[ns]').reshape(arr.shape)
+    return arr.astype('datetime64[ns]')
+
+def decimal_year(dates):
+    """Converts dates to decimal years; numeric input is taken to be decimal years already."""
+    arr = np.asarray(dates)
+    if arr.dtype.kind in 'fiu':
+        return arr.astype(float)
+    dt = to_datetime64(arr)
+    year = dt.astype('datetime64[Y]')
+    start = year.astype('datetime64[ns]')
+    end = (year + 1).astype('datetime64[ns]')
+    return year.astype(np.int64) + 1970 + (dt - start) / (end - start)
+
+def _check_years(years):
+    first, last = _igrf_table()["IGRF_EPOCHS"][0], _igrf_table()["IGRF_VALID_UNTIL"]
+    if np.any(years < first) or np.any(years > last):
+        raise ValueError(f"Dates must lie between {first:.0f} and {last:.0f} for the bundled IGRF table.")
+
+def interpolate_coefficients(years):
+    """
+    Returns the degree-1/2 IGRF coefficients at decimal year(s), shape (..., 8).
+
+    Coefficients are interpolated linearly between 5-yearly epochs and
+    extrapolated with the secular variation after the last epoch.
+    """
+    years = np.asarray(years, dtype=float)
+    _check_years(years)
+    table = _igrf_table()
+    epochs = table["IGRF_EPOCHS"]
+    coefficients = np.stack([np.interp(years, epochs, table["IGRF_COEFFICIENTS"][:, k]) for k in range(8)], axis=-1)
+    after_last = np.maximum(years - epochs[-1], 0.0)[..., np.newaxis]
+    return coefficients + after_last * table["IGRF_SECULAR_VARIATION"]
+
+def _epoch_buckets(dates):
+    """
+    Quantizes dates into integer epoch buckets of 1/EPOCH_BUCKETS_PER_YEAR
+    years. The range is checked on the unrounded years, so dates just
+    outside it are not rounded into the first or last bucket.
+    """
+    years = decimal_year(dates)
+    _check_years(years)
+    return np.round(years * EPOCH_BUCKETS_PER_YEAR).astype(np.int64)
+
+_epoch_model_cache = collections.OrderedDict()
+_epoch_model_lock = threading.Lock()
+
+@instrumentation.stage("parameters.get_dipole_models_for_dates")
+def get_dipole_models_for_dates(dates, r0=R0):
+    """
+    Returns (models, index) for an array of dates.
+
+    Dates are quantized into epoch buckets of 1/EPOCH_BUCKETS_PER_YEAR years.
+    models is a tuple with one DipoleModel per distinct bucket and index has the
+    shape of dates, mapping every date to its entry in models. Models missing
+    from the bounded LRU cache are built together in one vectorized pass.
+    """
+    buckets = _epoch_buckets(dates)
+    unique_buckets, index = np.unique(buckets, return_inverse=True)
+    keys = [(int(b), float(r0)) for b in unique_buckets]
+
+    with _epoch_model_lock:
+        missing = [key for key in keys if key not in _epoch_model_cache]
+        if missing:
+            years = np.array([key[0] for key in missing], dtype=float) / EPOCH_BUCKETS_PER_YEAR
+            built = dict(zip(missing, build_dipole_models(interpolate_coefficients(years), r0)))
+        else:
+            built = {}
+        models = []
+        for key in keys:
+            model = built.get(key) or _epoch_model_cache[key]
+            _epoch_model_cache[key] = model
+            _epoch_model_cache.move_to_end(key)
+            models.append(model)
+        while len(_epoch_model_cache) > EPOCH_CACHE_SIZE:
+            _epoch_model_cache.popitem(last=False)
+
+    return tuple(models), index.reshape(buckets.shape)
+
+def get_dipole_model_for_date(date, r0=R0):
+    """Returns the time-interpolated DipoleModel for a single date or decimal year."""
+    models, _ = get_dipole_models_for_dates(np.reshape(np.asarray(date), -1)[:1], r0)
+    return models[0]
+
+def stack_dipole_models(models, index):
+    """
+    Gathers per-sample parameters into one DipoleModel with leading dimensions.
+
+    Every array attribute (and B0, the pole angles and the coefficients) gains
+    the shape of index in front of its usual shape, e.g. rotation_matrix
+    becomes (..., 3, 3). The batch functions broadcast over these dimensions,
+    so a whole time-tagged array is evaluated in one vectorized call.
+    """
+    def gather(attribute):
+        return np.stack([np.asarray(getattr(m, attribute), dtype=float) for m in models])[index]
+
+    return DipoleModel(
+        coefficients=gather("coefficients"),
+        r0=models[0].r0,
+        B0=gather("B0"),
+        theta_n_rad=gather("theta_n_rad"),
+        lambda_n_rad=gather("lambda_n_rad"),
+        rotation_matrix=gather("rotation_matrix"),
+        rotation_matrix_t=gather("rotation_matrix_t"),
+        ed_params_geo=gather("ed_params_geo"),
+        ed_params_cd=gather("ed_params_cd"),
+        ed_offset_geo=gather("ed_offset_geo"),
+    )
+
+@instrumentation.stage("parameters.get_stacked_dipole_model")
+def get_stacked_dipole_model(dates, r0=R0):
+    """
+    Returns a per-sample stacked DipoleModel for an array of dates.
+
+    Dates use the epoch buckets of get_dipole_models_for_dates, but the
+    stacked arrays are computed directly from the interpolated coefficients
+    of the distinct buckets in one vectorized pass, without building or
+    caching a DipoleModel per bucket.
+    """
+    buckets = _epoch_buckets(dates)
+    unique_buckets, index = np.unique(buckets, return_inverse=True)
+    index = index.reshape(buckets.shape)
+    c = interpolate_coefficients(unique_buckets / EPOCH_BUCKETS_PER_YEAR)
+    B0, theta_n_rad, lambda_n_rad = calculate_cd_parameters(c[:, 0], c[:, 1], c[:, 2])
+    rot_matrices = calculate_rotation_matrices(theta_n_rad, lambda_n_rad)
+    ed_params_geo = calculate_ed_parameters(*c.T, B0).T
+    arrays = {
+        "coefficients": c[index],
+        "B0": B0[index],
+        "theta_n_rad": theta_n_rad[index],
+        "lambda_n_rad": lambda_n_rad[index],
+        "rotation_matrix": rot_matrices[index],
+        "rotation_matrix_t": np.swapaxes(rot_matrices, -1, -2)[index],
+        "ed_params_geo": ed_params_geo[index],
+        "ed_params_cd": np.einsum("kij,kj->ki", rot_matrices, ed_params_geo)[index],
+        "ed_offset_geo": (r0 * ed_params_geo)[index],
+    }
+    for value in arrays.values():
+        value.setflags(write=False)
+    return DipoleModel(r0=r0, **arrays)
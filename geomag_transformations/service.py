@@ -0,0 +1,316 @@
+# geomag_transformations/service.py
+
+#This module serves field and local-time lookups over a small local HTTP
+#endpoint (TCP or Unix socket), gathering concurrent single-point requests
+#into micro-batches evaluated in one vectorized call.
+#
+#Each endpoint has a MicroBatcher: requests wait in a queue until
+#max_batch_size of them are pending or the oldest has waited max_wait_ms, the
+#batch is evaluated on a worker thread (so the event loop keeps accepting
+#requests meanwhile) and every caller's future receives its own result.
+#
+#Endpoints (JSON in, JSON out):
+#    POST /field  {"lat": 12.0, "lon": 88.0, "alt_km": 0.0, "date": "2020-01-01"}
+#    POST /times  {"lat": 12.0, "lon": 88.0, "utc": "2020-01-01T10:00:00"}
+#    GET  /stats  queue depth, batch-size histogram and latency percentiles
+#
+#Usage:
+#    python -m geomag_transformations.service --port 8765 --max-batch-size 512 --max-wait-ms 2
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import datetime
+import json
+import sys
+import time
+
+import numpy as np
+
+from . import field, parameters, times
+
+DEFAULT_MAX_BATCH_SIZE = 512
+DEFAULT_MAX_WAIT_MS = 2.0
+# Request latencies kept per endpoint for the percentiles in stats()
+LATENCY_SAMPLES = 4096
+MAX_BODY_BYTES = 1 << 20
+
+class MicroBatcher:
+    """
+    Collects single requests into batches for evaluate(list of requests) ->
+    list of results.
+
+    A batch is dispatched when max_batch_size requests are pending or
+    max_wait_ms after its first request arrived, whichever comes first.
+    Batches are evaluated one at a time on a dedicated worker thread; an
+    exception fails every request of that batch.
+    """
+
+    def __init__(self, evaluate, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.evaluate = evaluate
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._queue = asyncio.Queue()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._task = None
+        self._batch_sizes = collections.Counter()
+        self._latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._requests = 0
+        self._batches = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, request):
+        """Queues one request and waits for its result."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        submitted = time.perf_counter()
+        await self._queue.put((request, future))
+        try:
+            return await future
+        finally:
+            self._latencies.append(time.perf_counter() - submitted)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_s
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            requests = [request for request, _ in batch]
+            self._batches += 1
+            self._requests += len(batch)
+            self._batch_sizes[_histogram_bucket(len(batch))] += 1
+            try:
+                results = await loop.run_in_executor(self._executor, self.evaluate, requests)
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        """Queue depth, request/batch counts, batch-size histogram and latency percentiles."""
+        latencies = np.array(self._latencies)
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) if latencies.size else (0.0, 0.0, 0.0)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "requests": self._requests,
+            "batches": self._batches,
+            "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+            "batch_size_histogram": {
+                f"<={bucket}": count for bucket, count in sorted(self._batch_sizes.items())
+            },
+            "latency_p50_ms": float(p50) * 1e3,
+            "latency_p90_ms": float(p90) * 1e3,
+            "latency_p99_ms": float(p99) * 1e3,
+        }
+
+def _histogram_bucket(size):
+    """Smallest power of two >= size."""
+    return 1 << max(size - 1, 0).bit_length()
+
+def _to_json_values(outputs, i):
+    return {key: float(np.asarray(values).flat[i]) for key, values in outputs.items()}
+
+def _timestamp(value, name):
+    try:
+        return np.datetime64(str(value).rstrip("Z"), "ns")
+    except ValueError:
+        raise ValueError(f"{name!r} is not an ISO timestamp: {value!r}") from None
+
+def normalize_field_request(request):
+    """Validates a /field request into {"lat", "lon", "alt_km", "date"} with a datetime64 or None date."""
+    date = request.get("date")
+    if date is not None:
+        date = _timestamp(date, "date")
+        year = float(parameters.decimal_year(date))
+        if not parameters.IGRF_EPOCHS[0] <= year <= parameters.IGRF_VALID_UNTIL:
+            raise ValueError(f"date {request['date']!r} is outside the IGRF range "
+                             f"{parameters.IGRF_EPOCHS[0]:.0f}-{parameters.IGRF_VALID_UNTIL:.0f}")
+    return {"lat": float(request["lat"]), "lon": float(request["lon"]),
+            "alt_km": float(request.get("alt_km", 0.0)), "date": date}
+
+def normalize_times_request(request):
+    """Validates a /times request into {"lat", "lon", "utc"}; utc defaults to now."""
+    utc = request.get("utc")
+    if utc is None:
+        utc = np.datetime64(datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None), "ns")
+    else:
+        utc = _timestamp(utc, "utc")
+    return {"lat": float(request["lat"]), "lon": float(request["lon"]), "utc": utc}
+
+def evaluate_field_requests(requests):
+    """
+    Vectorized field evaluation of normalized /field requests. Requests
+    with a date use that epoch's IGRF model, the others IGRF-1990.
+    """
+    lat = np.array([r["lat"] for r in requests])
+    lon = np.array([r["lon"] for r in requests])
+    alt = np.array([r["alt_km"] for r in requests])
+    dated = np.array([r["date"] is not None for r in requests])
+    results = [None] * len(requests)
+    for mask in (~dated, dated):
+        index = np.flatnonzero(mask)
+        if index.size == 0:
+            continue
+        dates = np.array([requests[i]["date"] for i in index.tolist()]) if mask is dated else None
+        outputs = field.calculate_geomagnetic_field_fused(lat[index], lon[index], alt_km=alt[index], dates=dates)
+        for j, i in enumerate(index.tolist()):
+            results[i] = _to_json_values(outputs, j)
+    return results
+
+def evaluate_times_requests(requests):
+    """Vectorized local times (float hours) of normalized /times requests."""
+    lat = np.array([r["lat"] for r in requests])
+    lon = np.array([r["lon"] for r in requests])
+    utc = np.array([r["utc"] for r in requests])
+    outputs = times.calculate_geomagnetic_times_batch(lat, lon, utc)
+    return [_to_json_values(outputs, i) for i in range(len(requests))]
+
+class GeomagService:
+    """HTTP front end holding one MicroBatcher per endpoint."""
+
+    def __init__(self, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.batchers = {
+            "/field": MicroBatcher(evaluate_field_requests, max_batch_size, max_wait_ms),
+            "/times": MicroBatcher(evaluate_times_requests, max_batch_size, max_wait_ms),
+        }
+        self.normalizers = {"/field": normalize_field_request, "/times": normalize_times_request}
+        self.server = None
+
+    def stats(self):
+        return {path.lstrip("/"): batcher.stats() for path, batcher in self.batchers.items()}
+
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        """Starts listening on host:port, or on a Unix socket when unix_path is given."""
+        for batcher in self.batchers.values():
+            batcher.start()
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    async def _handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "request body too large"})
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self._route(method, path, body)
+                await self._respond(writer, status, payload, headers.get("connection", "").lower() == "close")
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        batcher = self.batchers.get(path)
+        if batcher is None or method != "POST":
+            return 404, {"error": f"no route for {method} {path}"}
+        try:
+            request = self.normalizers[path](json.loads(body))
+        except KeyError as error:
+            return 400, {"error": f"missing field {error}"}
+        except (ValueError, TypeError, AttributeError) as error:
+            return 400, {"error": str(error)}
+        try:
+            return 200, await batcher.submit(request)
+        except Exception as error:
+            return 500, {"error": f"{type(error).__name__}: {error}"}
+
+    @staticmethod
+    async def _respond(writer, status, payload, close=False):
+        body = json.dumps(payload).encode()
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large", 500: "Internal Server Error"}[status]
+        head = (
+            f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    """Runs the service until cancelled."""
+    service = GeomagService(max_batch_size, max_wait_ms)
+    server = await service.start(host, port, unix_path)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-batching geomagnetic field/time lookup service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+    where = args.unix or f"http://{args.host}:{args.port}"
+    print(f"Serving geomagnetic lookups on {where} (batch <= {args.max_batch_size}, wait <= {args.max_wait_ms} ms)")
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.max_batch_size, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())